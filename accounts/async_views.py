@@ -0,0 +1,78 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from hello_laundry_apis.async_api import AsyncAPIView
+from . import utils
+from .delivery import aenqueue_otp
+from .otp import OTPThrottled
+from .serializers import SendOTPSerializer, VerifyOTPSerializer
+from .utils import astore_otp, login_with_otp
+
+
+# Async versions of the views in accounts/views.py, used in ASGI mode
+# (settings.ASYNC_VIEWS). Same requests and responses.
+
+class SendOTPView(AsyncAPIView):
+    authenticated = False
+
+    async def post(self, request):
+        serializer = SendOTPSerializer(data=request.data)
+        if serializer.is_valid():
+            contact = serializer.validated_data.get("mobile")
+            otp = utils.generate_otp()
+            try:
+                await astore_otp(contact, otp)
+            except OTPThrottled:
+                return self.response({
+                    "success": False,
+                    "message": "Too many OTP requests. Please try again later."
+                }, status.HTTP_429_TOO_MANY_REQUESTS)
+            await aenqueue_otp(contact, otp)
+
+            return self.response({
+                "success": True,
+                "message": "OTP sent successfully.",
+                "contact": contact
+            })
+
+        return self.response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+
+class VerifyOTPView(AsyncAPIView):
+    authenticated = False
+
+    async def post(self, request):
+        serializer = VerifyOTPSerializer(data=request.data)
+        if serializer.is_valid():
+            mobile = serializer.validated_data.get("mobile")
+            email = serializer.validated_data.get("email")
+
+            try:
+                # Verifying and logging in share a transaction, which the
+                # async ORM can't hold
+                login = await sync_to_async(login_with_otp)(mobile, serializer.validated_data["otp"], email)
+            except Exception as ex:
+                return self.response({
+                    "success": False,
+                    "message": str(ex)
+                }, status.HTTP_400_BAD_REQUEST)
+            if login is None:
+                return self.response({
+                    "success": False,
+                    "message": "Invalid or expired OTP."
+                }, status.HTTP_400_BAD_REQUEST)
+            user, token, has_address = login
+
+            return self.response({
+                "success": True,
+                "message": "Login successful.",
+                "token": token.key,
+                "user": {
+                    "mobile": user.mobile,
+                    "email": user.email,
+                    "user_name": user.full_name,
+                    "address": has_address
+                }
+            })
+
+        return self.response(serializer.errors, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,147 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+
+def token_cache_settings():
+    return {
+        "LOCAL_TTL": 30,
+        "LOCAL_MAXSIZE": 10000,
+        "SHARED_TTL": 0,
+        **getattr(settings, "TOKEN_AUTH_CACHE", {}),
+    }
+
+
+class LocalTokenCache:
+    """
+    Small thread-safe LRU of token key -> user with a per-entry TTL.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user, ttl, maxsize):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_token_cache = LocalTokenCache()
+
+
+def shared_cache_key(key):
+    # Keep raw tokens out of the cache key space
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """
+    Forget a token in the shared cache and in this process. Other
+    processes drop their local copy within LOCAL_TTL.
+    """
+    local_token_cache.pop(key)
+    cache.delete(shared_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers warm tokens, first in a
+    per-process LRU and then, when SHARED_TTL is set, in the shared
+    Django cache, so most requests authenticate without touching the
+    database. Only set SHARED_TTL with a cache every worker reaches
+    (Redis): invalidate_token can't clear another process's memory.
+
+    Entries are dropped when the token is deleted or its user is saved
+    (which covers deactivation); see accounts.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        options = token_cache_settings()
+
+        user = local_token_cache.get(key)
+        if user is None:
+            shared = options["SHARED_TTL"] > 0
+            user = cache.get(shared_cache_key(key)) if shared else None
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                if shared:
+                    cache.set(shared_cache_key(key), user, options["SHARED_TTL"])
+            local_token_cache.set(key, user, options["LOCAL_TTL"], options["LOCAL_MAXSIZE"])
+
+        # Views may change request.user; don't let that leak into the cache
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
+
+    async def aauthenticate(self, request):
+        """
+        `authenticate` for async views: the caches and the token lookup
+        are awaited instead of blocking the event loop.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. No credentials provided."))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. Token string should not contain spaces."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain invalid characters.")
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        options = token_cache_settings()
+
+        user = local_token_cache.get(key)
+        if user is None:
+            shared = options["SHARED_TTL"] > 0
+            user = await cache.aget(shared_cache_key(key)) if shared else None
+            if user is None:
+                try:
+                    token = await self.get_model().objects.select_related("user").aget(key=key)
+                except self.get_model().DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_("Invalid token."))
+                if not token.user.is_active:
+                    raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+                user = token.user
+                if shared:
+                    await cache.aset(shared_cache_key(key), user, options["SHARED_TTL"])
+            local_token_cache.set(key, user, options["LOCAL_TTL"], options["LOCAL_MAXSIZE"])
+
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
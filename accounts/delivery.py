@@ -0,0 +1,145 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from . import utils
+from .models import OTPDelivery
+
+
+def delivery_settings():
+    return {
+        "EAGER": False,
+        "MAX_ATTEMPTS": 5,
+        "RETRY_BACKOFF": 2,
+        "LEASE": 60,
+        "RETENTION": 7 * 24 * 3600,
+        **getattr(settings, "OTP_DELIVERY", {}),
+    }
+
+
+def enqueue_otp(contact, otp):
+    """
+    Queue an OTP for the delivery worker; a single INSERT, so the request
+    doesn't wait on the SMS/SMTP gateway. With EAGER on (no worker
+    running, e.g. local development) it is claimed and sent straight away.
+    """
+    options = delivery_settings()
+    claim = claim_fields(options) if options["EAGER"] else {}
+    delivery = OTPDelivery.objects.create(contact=contact, otp=otp, **claim)
+    if options["EAGER"]:
+        deliver(delivery)
+    return delivery
+
+
+async def aenqueue_otp(contact, otp):
+    """
+    `enqueue_otp` for async views.
+    """
+    options = delivery_settings()
+    claim = claim_fields(options) if options["EAGER"] else {}
+    delivery = await OTPDelivery.objects.acreate(contact=contact, otp=otp, **claim)
+    if options["EAGER"]:
+        await sync_to_async(deliver)(delivery)
+    return delivery
+
+
+def claim_fields(options):
+    """
+    Field values of a row leased to this process under a new claim token.
+    """
+    return {
+        "status": OTPDelivery.SENDING,
+        "claim_token": uuid.uuid4().hex,
+        "next_attempt_at": timezone.now() + timedelta(seconds=options["LEASE"]),
+    }
+
+
+def claim_batch(limit):
+    """
+    Claim up to `limit` due deliveries for this worker. Rows are taken with
+    a conditional UPDATE so concurrent workers never claim the same one,
+    and leased so that rows of a crashed worker become due again.
+    """
+    due = OTPDelivery.objects.filter(
+        status__in=[OTPDelivery.PENDING, OTPDelivery.SENDING],
+        next_attempt_at__lte=timezone.now(),
+    )
+    ids = list(due.order_by("next_attempt_at").values_list("pk", flat=True)[:limit])
+    if not ids:
+        return []
+
+    claim = claim_fields(delivery_settings())
+    due.filter(pk__in=ids).update(**claim)
+    return list(OTPDelivery.objects.filter(claim_token=claim["claim_token"], status=OTPDelivery.SENDING))
+
+
+def deliver(delivery):
+    """
+    Make one attempt at sending `delivery`, then record the outcome:
+    sent, retried later with exponential backoff, or failed for good.
+    If the lease ran out meanwhile and another worker claimed the row,
+    the outcome is left to that worker.
+    """
+    options = delivery_settings()
+    attempts = delivery.attempts + 1
+    try:
+        utils.send_otp(delivery.contact, delivery.otp)
+    except Exception as ex:
+        if attempts >= options["MAX_ATTEMPTS"]:
+            changes = {"status": OTPDelivery.FAILED, "otp": ""}
+        else:
+            delay = options["RETRY_BACKOFF"] ** attempts
+            changes = {
+                "status": OTPDelivery.PENDING,
+                "next_attempt_at": timezone.now() + timedelta(seconds=delay),
+            }
+        changes["last_error"] = repr(ex)
+    else:
+        changes = {"status": OTPDelivery.SENT, "otp": "", "sent_at": timezone.now()}
+
+    OTPDelivery.objects.filter(pk=delivery.pk, claim_token=delivery.claim_token).update(
+        attempts=F("attempts") + 1, **changes
+    )
+    return changes["status"]
+
+
+def process_due(batch_size, pool=None):
+    """
+    Claim one batch and send it, on `pool` if given. Returns the outcome
+    of each delivery.
+    """
+    batch = claim_batch(batch_size)
+    if pool is None:
+        return [deliver(delivery) for delivery in batch]
+    return list(pool.map(_deliver_in_thread, batch))
+
+
+def _deliver_in_thread(delivery):
+    try:
+        return deliver(delivery)
+    finally:
+        connections.close_all()
+
+
+def run_worker(workers=4, batch_size=50, stop=None):
+    """
+    Process due deliveries on a bounded thread pool until `stop()` is
+    true; `stop` is checked after each batch, with the number of
+    deliveries the batch held. A single worker sends from the calling
+    thread.
+    """
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            outcomes = process_due(batch_size, pool)
+            if stop and stop(len(outcomes)):
+                return
+    finally:
+        if pool is not None:
+            pool.shutdown()
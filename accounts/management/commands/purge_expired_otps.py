@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.delivery import delivery_settings
+from accounts.models import OTP, OTPDelivery
+from accounts.otp import otp_settings
+
+#python manage.py purge_expired_otps
+class Command(BaseCommand):
+    help = (
+        "Delete OTP rows older than both the code TTL and the send window, and sent or failed OTP "
+        "deliveries older than OTP_DELIVERY['RETENTION'], in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # Rows still count towards the send limit after the code expires
+        otp_options = otp_settings()
+        keep = max(otp_options["TTL"], otp_options["SEND_WINDOW"])
+        expired = OTP.objects.filter(created_at__lt=now - timedelta(seconds=keep))
+        finished = OTPDelivery.objects.filter(
+            status__in=[OTPDelivery.SENT, OTPDelivery.FAILED],
+            created_at__lt=now - timedelta(seconds=delivery_settings()["RETENTION"]),
+        )
+
+        deleted = self.delete(expired, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired OTPs"))
+        deleted = self.delete(finished, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished OTP deliveries"))
+
+    def delete(self, queryset, batch_size):
+        # Small batches keep each DELETE short so logins aren't blocked
+        deleted = 0
+        while True:
+            batch = list(queryset.values_list("pk", flat=True)[:batch_size])
+            if not batch:
+                return deleted
+            deleted += queryset.model.objects.filter(pk__in=batch).delete()[0]
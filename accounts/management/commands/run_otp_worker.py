@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.delivery import run_worker
+
+#python manage.py run_otp_worker --workers 4
+class Command(BaseCommand):
+    help = "Send queued OTPs on a bounded worker pool, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--once", action="store_true", help="Exit once nothing is due")
+
+    def handle(self, *args, **options):
+        def stop(processed):
+            if processed:
+                return False
+            if options["once"]:
+                return True
+            time.sleep(options["poll_interval"])
+            return False
+
+        run_worker(workers=options["workers"], batch_size=options["batch_size"], stop=stop)
@@ -88,10 +88,52 @@ class User(AbstractBaseUser, models.Model):
 class OTP(models.Model):
     contact = models.CharField(max_length=100)  
     otp = models.CharField(max_length=10)
+    attempts = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["contact", "created_at"], name="otp_contact_created_idx"),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.created_at + timedelta(minutes=5)
 
     def __str__(self):
         return f"{self.contact} - {self.otp}"
+
+
+class OTPDelivery(models.Model):
+    """
+    An OTP waiting to be sent, or already sent, by the delivery worker
+    (see accounts.delivery).
+    """
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+
+    contact = models.CharField(max_length=100)
+    otp = models.CharField(max_length=10, blank=True)  # cleared once sent
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the row may next be claimed: retry time, or lease expiry while sending
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="otp_delivery_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.contact} - {self.status}"
@@ -0,0 +1,184 @@
+import hmac
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OTP
+
+
+class OTPThrottled(Exception):
+    pass
+
+
+def otp_settings():
+    return {
+        "BACKEND": "accounts.otp.DatabaseOTPBackend",
+        "TTL": 300,
+        "MAX_ATTEMPTS": 5,
+        "SEND_LIMIT": 5,
+        "SEND_WINDOW": 900,
+        **getattr(settings, "OTP", {}),
+    }
+
+
+class BaseOTPBackend:
+    """
+    Stores one-time passwords per contact.
+
+    `store` raises OTPThrottled once a contact has been sent SEND_LIMIT
+    codes within SEND_WINDOW seconds. `verify` consumes the code on
+    success and gives up on it after MAX_ATTEMPTS wrong guesses.
+
+    Backends with `transactional` set keep codes in the database, so a
+    consumed code comes back when the surrounding transaction rolls back;
+    others put it back with `restore`.
+    """
+    transactional = False
+
+    def __init__(self):
+        options = otp_settings()
+        self.ttl = options["TTL"]
+        self.max_attempts = options["MAX_ATTEMPTS"]
+        self.send_limit = options["SEND_LIMIT"]
+        self.send_window = options["SEND_WINDOW"]
+
+    def store(self, contact, otp):
+        raise NotImplementedError
+
+    def verify(self, contact, otp):
+        raise NotImplementedError
+
+    def restore(self, contact, otp):
+        raise NotImplementedError
+
+    # For async views. By default the sync methods run in a worker thread,
+    # one hop for the whole exchange.
+
+    async def astore(self, contact, otp):
+        await sync_to_async(self.store)(contact, otp)
+
+    async def averify(self, contact, otp):
+        return await sync_to_async(self.verify)(contact, otp)
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    Codes live in the Django cache and expire with it; nothing is
+    written to the database. Needs a cache every worker shares (Redis):
+    with a per-process cache, codes, attempts and throttles would be
+    counted per worker.
+    """
+
+    def code_key(self, contact):
+        return f"otp:code:{contact}"
+
+    def attempts_key(self, contact):
+        return f"otp:attempts:{contact}"
+
+    def sends_key(self, contact):
+        return f"otp:sends:{contact}"
+
+    def store(self, contact, otp):
+        sends_key = self.sends_key(contact)
+        cache.add(sends_key, 0, self.send_window)
+        try:
+            sends = cache.incr(sends_key)
+        except ValueError:
+            # Window expired between add() and incr()
+            cache.set(sends_key, 1, self.send_window)
+            sends = 1
+        if sends > self.send_limit:
+            raise OTPThrottled()
+
+        cache.set(self.code_key(contact), otp, self.ttl)
+        cache.delete(self.attempts_key(contact))
+
+    def restore(self, contact, otp):
+        cache.set(self.code_key(contact), otp, self.ttl)
+
+    def verify(self, contact, otp):
+        code_key, attempts_key = self.code_key(contact), self.attempts_key(contact)
+        stored = cache.get(code_key)
+        if stored is None:
+            return False
+
+        if hmac.compare_digest(str(stored).encode(), str(otp).encode()):
+            cache.delete_many([code_key, attempts_key])
+            return True
+
+        cache.add(attempts_key, 0, self.ttl)
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            attempts = 1
+        if attempts >= self.max_attempts:
+            cache.delete_many([code_key, attempts_key])
+        return False
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """
+    Codes are rows in the OTP table, for deployments without a cache
+    shared between workers. Expired rows are removed by the
+    purge_expired_otps command.
+    """
+    transactional = True
+
+    def store(self, contact, otp):
+        window_start = timezone.now() - timedelta(seconds=self.send_window)
+        if OTP.objects.filter(contact=contact, created_at__gte=window_start).count() >= self.send_limit:
+            raise OTPThrottled()
+        OTP.objects.create(contact=contact, otp=otp)
+
+    def verify(self, contact, otp):
+        latest = (
+            OTP.objects.filter(
+                contact=contact,
+                created_at__gte=timezone.now() - timedelta(seconds=self.ttl),
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if latest is None or latest.attempts >= self.max_attempts:
+            return False
+
+        if hmac.compare_digest(latest.otp.encode(), str(otp).encode()):
+            latest.delete()
+            return True
+
+        OTP.objects.filter(pk=latest.pk).update(attempts=F("attempts") + 1)
+        return False
+
+    async def astore(self, contact, otp):
+        window_start = timezone.now() - timedelta(seconds=self.send_window)
+        if await OTP.objects.filter(contact=contact, created_at__gte=window_start).acount() >= self.send_limit:
+            raise OTPThrottled()
+        await OTP.objects.acreate(contact=contact, otp=otp)
+
+    async def averify(self, contact, otp):
+        latest = await (
+            OTP.objects.filter(
+                contact=contact,
+                created_at__gte=timezone.now() - timedelta(seconds=self.ttl),
+            )
+            .order_by("-created_at")
+            .afirst()
+        )
+        if latest is None or latest.attempts >= self.max_attempts:
+            return False
+
+        if hmac.compare_digest(latest.otp.encode(), str(otp).encode()):
+            await latest.adelete()
+            return True
+
+        await OTP.objects.filter(pk=latest.pk).aupdate(attempts=F("attempts") + 1)
+        return False
+
+
+def get_otp_backend():
+    return import_string(otp_settings()["BACKEND"])()
@@ -1,3 +1,395 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from laundry_app.models import CustomerAddress, Language
+from . import async_views
+from .authentication import local_token_cache, shared_cache_key
+from .delivery import claim_batch, deliver, enqueue_otp
+from .models import OTP, OTPDelivery, User
+from .otp import DatabaseOTPBackend, OTPThrottled, get_otp_backend
+from .utils import get_login
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = User.objects.create_user(mobile="50000001")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        Language.objects.create(name="English", code="en")
+        self.url = reverse("language-list")
+
+    def test_warm_token_skips_the_database(self):
+        # token + user, languages
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(TOKEN_AUTH_CACHE={"SHARED_TTL": 300})
+    def test_shared_cache_serves_other_processes(self):
+        self.client.get(self.url)
+        local_token_cache.clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(TOKEN_AUTH_CACHE={"SHARED_TTL": 0})
+    def test_no_shared_layer_without_shared_ttl(self):
+        self.client.get(self.url)
+        local_token_cache.clear()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(cache.get(shared_cache_key(self.token.key)))
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(self.url)
+        self.token.delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_unknown_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token nope")
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class OTPFlowMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def send(self, mobile="50000001"):
+        with mock.patch("accounts.utils.generate_otp", return_value="1234"):
+            return self.client.post(reverse("send_otp"), {"mobile": mobile})
+
+    def verify(self, otp, mobile="50000001"):
+        return self.client.post(reverse("verify_otp"), {"mobile": mobile, "otp": otp})
+
+    def test_login_with_sent_code(self):
+        self.assertEqual(self.send().status_code, 200)
+
+        response = self.verify("1234")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["token"])
+        # Codes are single use
+        self.assertEqual(self.verify("1234").status_code, 400)
+
+    def test_wrong_guesses_burn_the_code(self):
+        self.send()
+        for _ in range(5):
+            self.assertEqual(self.verify("0000").status_code, 400)
+
+        self.assertEqual(self.verify("1234").status_code, 400)
+
+    def test_failed_login_keeps_the_code(self):
+        self.send()
+        with mock.patch("accounts.utils.get_login", side_effect=ValueError("Login failed")):
+            response = self.verify("1234")
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.verify("1234").status_code, 200)
+
+    def test_non_ascii_code_is_rejected(self):
+        self.send()
+        # Arabic-Indic digits for 1234
+        self.assertEqual(self.verify("\u0661\u0662\u0663\u0664").status_code, 400)
+        self.assertEqual(self.verify("1234").status_code, 200)
+
+    def test_sends_are_throttled_per_contact(self):
+        for _ in range(5):
+            self.assertEqual(self.send().status_code, 200)
+
+        self.assertEqual(self.send().status_code, 429)
+        self.assertEqual(self.send(mobile="50000002").status_code, 200)
+
+
+@override_settings(OTP={"BACKEND": "accounts.otp.CacheOTPBackend"})
+class CacheOTPBackendTests(OTPFlowMixin, TestCase):
+
+    def test_nothing_is_written_to_the_otp_table(self):
+        self.send()
+        self.verify("1234")
+        self.assertFalse(OTP.objects.exists())
+
+    def test_code_expires_with_the_cache(self):
+        self.send()
+        cache.delete("otp:code:50000001")
+        self.assertEqual(self.verify("1234").status_code, 400)
+
+
+@override_settings(OTP={"BACKEND": "accounts.otp.DatabaseOTPBackend"})
+class DatabaseOTPBackendTests(OTPFlowMixin, TestCase):
+
+    def test_expired_code_is_rejected(self):
+        self.send()
+        OTP.objects.update(created_at=timezone.now() - timedelta(minutes=6))
+        self.assertEqual(self.verify("1234").status_code, 400)
+
+    def test_is_the_default(self):
+        with self.settings(OTP={}):
+            self.assertIsInstance(get_otp_backend(), DatabaseOTPBackend)
+
+
+class AsyncOTPFlowMixin(OTPFlowMixin):
+    """
+    The OTP flow against the async views served in ASGI mode.
+    """
+
+    def post(self, view, data):
+        request = AsyncRequestFactory().post("/", data, content_type="application/json")
+        response = async_to_sync(view.as_view())(request)
+        response.data = json.loads(response.content)
+        return response
+
+    def send(self, mobile="50000001"):
+        with mock.patch("accounts.utils.generate_otp", return_value="1234"):
+            return self.post(async_views.SendOTPView, {"mobile": mobile})
+
+    def verify(self, otp, mobile="50000001"):
+        return self.post(async_views.VerifyOTPView, {"mobile": mobile, "otp": otp})
+
+    def test_responses_match_sync_views(self):
+        self.assertEqual(self.send().data, {
+            "success": True, "message": "OTP sent successfully.", "contact": "50000001",
+        })
+        self.assertEqual(OTPDelivery.objects.get().contact, "50000001")
+
+        data = self.verify("1234").data
+        user = User.objects.get(mobile="50000001")
+        self.assertEqual(data["token"], user.auth_token.key)
+        self.assertEqual(data["user"], {
+            "mobile": "50000001", "email": None, "user_name": user.full_name, "address": False,
+        })
+
+    def test_invalid_request(self):
+        response = self.post(async_views.SendOTPView, {})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("mobile", response.data)
+
+
+@override_settings(OTP={"BACKEND": "accounts.otp.CacheOTPBackend"})
+class AsyncCacheOTPBackendTests(AsyncOTPFlowMixin, TestCase):
+    pass
+
+
+@override_settings(OTP={"BACKEND": "accounts.otp.DatabaseOTPBackend"})
+class AsyncDatabaseOTPBackendTests(AsyncOTPFlowMixin, TestCase):
+
+    def test_expired_code_is_rejected(self):
+        self.send()
+        OTP.objects.update(created_at=timezone.now() - timedelta(minutes=6))
+        self.assertEqual(self.verify("1234").status_code, 400)
+
+
+class PurgeExpiredOTPsTests(TestCase):
+
+    def test_only_expired_rows_are_deleted(self):
+        OTP.objects.bulk_create(OTP(contact=str(i), otp="1234") for i in range(7))
+        OTP.objects.filter(contact__in=["0", "1", "2", "3", "4"]).update(
+            created_at=timezone.now() - timedelta(minutes=20)
+        )
+
+        out = StringIO()
+        call_command("purge_expired_otps", batch_size=2, stdout=out)
+
+        self.assertIn("Deleted 5 expired OTPs", out.getvalue())
+        self.assertEqual(sorted(OTP.objects.values_list("contact", flat=True)), ["5", "6"])
+
+    def test_purge_keeps_the_send_limit(self):
+        backend = DatabaseOTPBackend()
+        for _ in range(5):
+            backend.store("50000001", "1234")
+        # Codes have expired, but they are still inside the send window
+        OTP.objects.update(created_at=timezone.now() - timedelta(minutes=10))
+
+        call_command("purge_expired_otps", stdout=StringIO())
+
+        with self.assertRaises(OTPThrottled):
+            backend.store("50000001", "1234")
+
+    def test_finished_deliveries_are_deleted_after_retention(self):
+        old = timezone.now() - timedelta(days=8)
+        for i, status in enumerate([OTPDelivery.SENT, OTPDelivery.FAILED, OTPDelivery.PENDING]):
+            OTPDelivery.objects.create(contact=f"old-{i}", status=status)
+            OTPDelivery.objects.create(contact=f"new-{i}", status=status)
+        OTPDelivery.objects.filter(contact__startswith="old").update(created_at=old)
+
+        out = StringIO()
+        call_command("purge_expired_otps", batch_size=1, stdout=out)
+
+        self.assertIn("Deleted 2 finished OTP deliveries", out.getvalue())
+        self.assertEqual(
+            sorted(OTPDelivery.objects.values_list("contact", flat=True)), ["new-0", "new-1", "new-2", "old-2"]
+        )
+
+
+class OTPDeliveryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def run_worker(self):
+        # Worker threads can't see the test transaction; send inline
+        call_command("run_otp_worker", "--once", "--workers", "1")
+
+    def test_send_otp_only_queues_the_message(self):
+        with mock.patch("accounts.utils.send_otp") as send:
+            response = APIClient().post(reverse("send_otp"), {"mobile": "50000001"})
+        self.assertEqual(response.status_code, 200)
+        send.assert_not_called()
+
+        delivery = OTPDelivery.objects.get()
+        self.assertEqual(delivery.status, OTPDelivery.PENDING)
+        self.assertEqual(len(delivery.otp), 4)
+
+    def test_worker_sends_due_deliveries(self):
+        enqueue_otp("50000001", "1234")
+        enqueue_otp("50000002", "5678")
+
+        with mock.patch("accounts.utils.send_otp") as send:
+            self.run_worker()
+
+        self.assertEqual(
+            sorted(call.args for call in send.call_args_list),
+            [("50000001", "1234"), ("50000002", "5678")],
+        )
+        for delivery in OTPDelivery.objects.all():
+            self.assertEqual(delivery.status, OTPDelivery.SENT)
+            self.assertEqual(delivery.otp, "")
+            self.assertIsNotNone(delivery.sent_at)
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        delivery = enqueue_otp("50000001", "1234")
+
+        with mock.patch("accounts.utils.send_otp", side_effect=ConnectionError("gateway down")):
+            for attempt in range(1, 6):
+                self.run_worker()
+                delivery.refresh_from_db()
+                self.assertEqual(delivery.attempts, attempt)
+                if attempt < 5:
+                    self.assertEqual(delivery.status, OTPDelivery.PENDING)
+                    self.assertGreater(delivery.next_attempt_at, timezone.now())
+                    # Nothing is due until the backoff has passed
+                    self.assertEqual(claim_batch(10), [])
+                    OTPDelivery.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(delivery.status, OTPDelivery.FAILED)
+        self.assertIn("gateway down", delivery.last_error)
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        enqueue_otp("50000001", "1234")
+
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+
+        # Lease of a crashed worker runs out
+        OTPDelivery.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_batch(10)), 1)
+
+    def test_expired_lease_outcome_is_left_to_the_new_claim(self):
+        enqueue_otp("50000001", "1234")
+        [stale] = claim_batch(10)
+        OTPDelivery.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        [current] = claim_batch(10)
+
+        with mock.patch("accounts.utils.send_otp"):
+            deliver(stale)
+
+        current.refresh_from_db()
+        self.assertEqual((current.status, current.attempts), (OTPDelivery.SENDING, 0))
+
+    @override_settings(OTP_DELIVERY={"EAGER": True})
+    def test_eager_deliveries_are_not_claimed_by_workers(self):
+        claimed = []
+        with mock.patch("accounts.utils.send_otp", side_effect=lambda *args: claimed.extend(claim_batch(10))):
+            delivery = enqueue_otp("50000001", "1234")
+
+        self.assertEqual(claimed, [])
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.status, delivery.attempts), (OTPDelivery.SENT, 1))
+
+
+@override_settings(OTP={"BACKEND": "accounts.otp.CacheOTPBackend"})
+class VerifyOTPLoginTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, mobile="50000001", email=None):
+        cache.set(f"otp:code:{mobile}", "1234")
+        data = {"mobile": mobile, "otp": "1234"}
+        if email:
+            data["email"] = email
+        response = self.client.post(reverse("verify_otp"), data)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_returning_user_costs_one_query(self):
+        user = User.objects.create_user(mobile="50000001", full_name="Razia")
+        token = Token.objects.create(user=user)
+        CustomerAddress.objects.create(
+            user=user, name="Home", country="Qatar", city="Doha", latitude=0, longitude=0
+        )
+
+        with self.assertNumQueries(1):
+            data = self.login()
+
+        self.assertEqual(data["token"], token.key)
+        self.assertEqual(data["user"], {
+            "mobile": "50000001", "email": None, "user_name": "Razia", "address": True,
+        })
+
+    def test_new_user_gets_user_and_token_in_one_transaction(self):
+        # lookup, savepoint, user, token, release
+        with self.assertNumQueries(5):
+            data = self.login(email="new@example.com")
+
+        user = User.objects.get(mobile="50000001")
+        self.assertEqual(user.email, "new@example.com")
+        self.assertEqual(data["token"], user.auth_token.key)
+        self.assertFalse(data["user"]["address"])
+
+    def test_user_without_token_gets_one(self):
+        User.objects.create_user(mobile="50000001")
+
+        # lookup, savepoint, token, release
+        with self.assertNumQueries(4):
+            data = self.login()
+        self.assertTrue(data["token"])
+
+    def test_mobile_match_wins_over_email_match(self):
+        by_email = User.objects.create_user(mobile="50000009", email="a@example.com")
+        by_mobile = User.objects.create_user(mobile="50000001")
+
+        user, _, _ = get_login("50000001", "a@example.com")
+        self.assertEqual(user, by_mobile)
+        user, _, _ = get_login("50000002", "a@example.com")
+        self.assertEqual(user, by_email)
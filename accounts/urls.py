@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from .views import SendOTPView, VerifyOTPView, SetCustomerNameView
+from . import async_views, views
+from .views import SetCustomerNameView
+
+# In ASGI mode the OTP endpoints are served by their async views
+otp_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('send-otp/', SendOTPView.as_view(), name='send_otp'),
-    path('verify-otp/', VerifyOTPView.as_view(), name='verify_otp'),
+    path('send-otp/', otp_views.SendOTPView.as_view(), name='send_otp'),
+    path('verify-otp/', otp_views.VerifyOTPView.as_view(), name='verify_otp'),
     path('customer/set-name/', SetCustomerNameView.as_view(), name='set-customer-name'),
 ]
@@ -1,7 +1,11 @@
 import requests
 import random
-from django.core.cache import cache
-from .models import OTP
+from contextlib import nullcontext
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.authtoken.models import Token
+from .models import User
+from .otp import get_otp_backend
 
 def generate_otp():
     return str(random.randint(1000, 9999))
@@ -11,6 +15,79 @@ def send_otp(contact, otp):
     print(f"OTP for {contact}: {otp}")
 
 def store_otp(contact, otp):
-    OTP.objects.create(contact=contact, otp=otp)
-    print("OTP stored in the db.")
-    # cache.set(f"otp_{contact}", otp, timeout=300)  
+    # Raises OTPThrottled when the contact has asked for too many codes
+    get_otp_backend().store(contact, otp)
+
+async def astore_otp(contact, otp):
+    await get_otp_backend().astore(contact, otp)
+
+
+def login_with_otp(mobile, otp, email=None):
+    """
+    Verify `otp` and log in with get_login. The code is only used up by a
+    login that succeeds: codes in the OTP table are consumed inside the
+    login's transaction, cached ones are restored if the login fails.
+
+    Returns (user, token, has_address), or None for a wrong or expired
+    code.
+    """
+    backend = get_otp_backend()
+    with transaction.atomic() if backend.transactional else nullcontext():
+        if not backend.verify(mobile, otp):
+            return None
+        try:
+            return get_login(mobile, email)
+        except Exception:
+            if not backend.transactional:
+                backend.restore(mobile, otp)
+            raise
+
+
+def get_login(mobile, email=None, retry=True):
+    """
+    Find or create the user logging in and their token.
+
+    Returning users with a token cost one query: the user is matched on
+    mobile (or else email) with the token joined in and `has_address`
+    annotated. New users add the user and token INSERTs, in one
+    transaction.
+
+    Returns (user, token, has_address).
+    """
+    from laundry_app.models import CustomerAddress
+
+    email = email or None
+    match = Q(mobile=mobile)
+    if email:
+        match |= Q(email=email)
+    candidates = list(
+        User.objects.filter(match)
+        .select_related("auth_token")
+        .annotate(has_address=Exists(CustomerAddress.objects.filter(user=OuterRef("pk"))))[:2]
+    )
+    # A mobile match wins over an email match
+    candidates.sort(key=lambda u: u.mobile != mobile)
+    user = candidates[0] if candidates else None
+
+    if user is not None:
+        try:
+            return user, user.auth_token, user.has_address
+        except Token.DoesNotExist:
+            # The join already showed there is no token; skip get_or_create's SELECT
+            try:
+                with transaction.atomic():
+                    token = Token.objects.create(user=user)
+            except IntegrityError:
+                token = Token.objects.get(user=user)
+            return user, token, user.has_address
+
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(email=email, mobile=mobile)
+            token = Token.objects.create(user=user)
+    except IntegrityError:
+        if not retry:
+            raise
+        # A concurrent login created the same user first
+        return get_login(mobile, email, retry=False)
+    return user, token, False
@@ -3,10 +3,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from .models import OTP
 from laundry_app.models import CustomerAddress
 from .serializers import SendOTPSerializer, VerifyOTPSerializer, SetNameSerializer
-from .utils import generate_otp, send_otp, store_otp
+from .delivery import enqueue_otp
+from .otp import OTPThrottled
+from . import utils
+from .utils import login_with_otp, store_otp
 from django.core.cache import cache
 from rest_framework.permissions import AllowAny
 from rest_framework.generics import GenericAPIView
@@ -24,9 +26,15 @@ class SendOTPView(GenericAPIView):
             email = serializer.validated_data.get("email")
             mobile = serializer.validated_data.get("mobile")
             contact = mobile
-            otp = generate_otp()
-            send_otp(contact, otp)
-            store_otp(contact, otp)
+            otp = utils.generate_otp()
+            try:
+                store_otp(contact, otp)
+            except OTPThrottled:
+                return Response({
+                    "success": False,
+                    "message": "Too many OTP requests. Please try again later."
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            enqueue_otp(contact, otp)
 
             return Response({
                 "success": True,
@@ -48,42 +56,19 @@ class VerifyOTPView(GenericAPIView):
             email = serializer.validated_data.get("email")
             otp = serializer.validated_data["otp"]
 
-            # cached_otp = cache.get(f"otp_{mobile}")
-            cached_otp = OTP.objects.filter(contact=mobile).order_by('-created_at').first()
-            
-            if not cached_otp or cached_otp.otp != otp or cached_otp.is_expired():
-                return Response({
-                    "success": False,
-                    "message": "Invalid or expired OTP."
-                }, status=status.HTTP_400_BAD_REQUEST)
             try:
-                user = User.objects.filter(mobile=mobile).first()
-
-                if not user:
-                    # If email is provided, check if a user with that email exists
-                    if email:
-                        user = User.objects.filter(email=email).first()
-                    if not user:
-                        # Create new user
-                        user = User.objects.create_user(email=email, mobile=mobile)
+                login = login_with_otp(mobile, otp, email)
             except Exception as ex:
                 return Response({
                     "success": False,
                     "message": str(ex)
                 }, status=status.HTTP_400_BAD_REQUEST)
-
-            try:
-                token, _ = Token.objects.get_or_create(user=user)
-            except Exception as ex:
+            if login is None:
                 return Response({
                     "success": False,
-                    "message": str(ex)
+                    "message": "Invalid or expired OTP."
                 }, status=status.HTTP_400_BAD_REQUEST)
-
-            # cache.delete(f"otp_{mobile}")
-            cached_otp.delete()
-
-            has_address = user.addresses.exists()
+            user, token, has_address = login
 
             return Response({
                 "success": True,
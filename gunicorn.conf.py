@@ -0,0 +1,15 @@
+import os
+
+# SERVER_MODE=asgi serves hello_laundry_apis.asgi on uvicorn workers (and
+# switches the I/O-bound endpoints to their async views, see settings).
+# Anything else keeps the sync WSGI workers. Worker count comes from
+# WEB_CONCURRENCY as usual.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "hello_laundry_apis.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "hello_laundry_apis.wsgi:application"
@@ -0,0 +1,90 @@
+import json
+
+from django.http import HttpResponse, QueryDict
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+
+from accounts.authentication import CachedTokenAuthentication
+from .metrics import render_timer
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of DRF's APIView for the I/O-bound endpoints served
+    in ASGI mode; DRF views are sync only and would each take a thread.
+
+    Handlers are `async def` and return `self.response(data, status)`,
+    rendered like DRF's Response. As in DRF, `request.data` holds the
+    parsed JSON or form body and `request.query_params` the query string,
+    so the DRF serializers are reused for validation and output.
+
+    Requests are authenticated with CachedTokenAuthentication, awaited;
+    set `authenticated = False` for public endpoints.
+
+    Views with an ETag override `get_etag`. GET and HEAD requests then get
+    the ETag header and a 304 for a matching If-None-Match, as with
+    django.views.decorators.http.condition. Its `etag_func` is called
+    synchronously, so it can't read the cache from the event loop.
+    """
+    authenticated = True
+    authentication = CachedTokenAuthentication()
+    renderer = JSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated, not session; same as DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.query_params = request.GET
+        try:
+            request.data = self.parse(request)
+        except ValueError as ex:
+            return self.response({"detail": f"JSON parse error - {ex}"}, status.HTTP_400_BAD_REQUEST)
+
+        if self.authenticated:
+            try:
+                result = await self.authentication.aauthenticate(request)
+            except exceptions.AuthenticationFailed as ex:
+                return self.unauthorized(ex.detail)
+            if result is None:
+                return self.unauthorized(exceptions.NotAuthenticated.default_detail)
+            request.user, request.auth = result
+
+        if request.method not in ("GET", "HEAD"):
+            return await super().dispatch(request, *args, **kwargs)
+        etag = await self.get_etag(request, *args, **kwargs)
+        if etag is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+        response.headers.setdefault("ETag", etag)
+        return response
+
+    async def get_etag(self, request, *args, **kwargs):
+        return None
+
+    def parse(self, request):
+        if request.method not in ("POST", "PUT", "PATCH"):
+            return QueryDict()
+        if request.content_type == "application/json":
+            return json.loads(request.body or b"{}")
+        return request.POST
+
+    def response(self, data, status=status.HTTP_200_OK):
+        with render_timer():
+            content = self.renderer.render(data)
+        return HttpResponse(content, status=status, content_type="application/json")
+
+    def unauthorized(self, detail):
+        response = self.response({"detail": detail}, status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = self.authentication.authenticate_header(None)
+        return response
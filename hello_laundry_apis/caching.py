@@ -0,0 +1,104 @@
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+# How long a recompute may hold the lock before others give up on it
+LOCK_TIMEOUT = 30
+# How long a caller with nothing to serve waits for someone else's recompute
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+# Backends whose writes are only seen by the process that made them
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared(alias="default"):
+    """
+    Whether every worker sees the same cache (Redis, the database), as
+    the version counters and throttles built on it assume.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def make_key(namespace, *parts):
+    """
+    `namespace:part:part...`. Every key this project caches goes through
+    here, on top of settings.CACHES' KEY_PREFIX and VERSION.
+    """
+    return ":".join([namespace, *(str(part) for part in parts)])
+
+
+def _should_refresh(expires_at, delta, beta):
+    """
+    Probabilistic early expiration ("XFetch"): the closer the entry is
+    to expiring, and the longer it took to compute, the more likely a
+    caller refreshes it early. Callers spread out over time instead of
+    all missing at once.
+    """
+    if expires_at is None:
+        return False
+    return time.time() - delta * beta * math.log(random.random() or 1e-12) >= expires_at
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """
+    Cached value of `compute()` under `key`, recomputed at most
+    once at a time across all workers sharing the cache.
+
+    - Before expiry, callers refresh early now and then (see
+      _should_refresh); the one that takes the lock recomputes while the
+      rest keep serving the current value.
+    - After expiry, one caller recomputes and the others wait up to
+      WAIT_TIMEOUT seconds for its result before computing themselves.
+
+    Values are stored wrapped with their expiry and compute time, so
+    keys written here should only be read through here.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        if not _should_refresh(expires_at, delta, beta):
+            return value
+
+    lock_key = make_key("lock", key)
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[0]
+        entry = _wait_for(key)
+        if entry is not None:
+            return entry[0]
+        # The lock holder is slow or gone; don't fail the request
+        return _compute_and_store(key, compute, timeout)
+
+    try:
+        return _compute_and_store(key, compute, timeout)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def _compute_and_store(key, compute, timeout):
+    start = time.time()
+    value = compute()
+    delta = time.time() - start
+    expires_at = start + delta + timeout if timeout is not None else None
+    cache.set(key, (value, expires_at, delta), timeout)
+    return value
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
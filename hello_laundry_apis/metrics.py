@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Metrics of the request being handled in this thread/task, if any
+_current = ContextVar("request_metrics", default=None)
+
+
+def metrics_settings():
+    return {
+        "N_PLUS_ONE_THRESHOLD": 20,
+        "SERVER_TIMING": False,
+        "TOKEN": None,
+        **getattr(settings, "REQUEST_METRICS", {}),
+    }
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """
+    Per-process metrics, labelled by (view, method). With several worker
+    processes each one reports its own numbers; the scraper adds them up.
+    """
+    HISTOGRAMS = {
+        "http_request_duration_seconds": ("Wall time per request", DURATION_BUCKETS),
+        "db_queries_per_request": ("Database queries per request", QUERY_BUCKETS),
+        "db_query_duration_seconds": ("Database time per request", DURATION_BUCKETS),
+        "render_duration_seconds": ("Response rendering time per request", DURATION_BUCKETS),
+        "http_response_size_bytes": ("Response body size", SIZE_BUCKETS),
+    }
+    COUNTERS = {
+        "n_plus_one_requests_total": "Requests over the N+1 query threshold",
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.counters = {name: {} for name in self.COUNTERS}
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            series = self.histograms[name]
+            if labels not in series:
+                series[labels] = Histogram(self.HISTOGRAMS[name][1])
+            series[labels].observe(value)
+
+    def increment(self, name, labels):
+        with self.lock:
+            self.counters[name][labels] = self.counters[name].get(labels, 0) + 1
+
+    def render(self):
+        """
+        Everything recorded so far in the Prometheus text format.
+        """
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in self.HISTOGRAMS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    label_text = format_labels(labels)
+                    cumulative = 0
+                    for bound, count in zip((*buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+            for name, help_text in self.COUNTERS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f"{name}{{{format_labels(labels)}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    view, method = labels
+    view = view.replace("\\", "\\\\").replace('"', '\\"')
+    return f'view="{view}",method="{method}"'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.render_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    # Installed on every connection for good; counts towards the request
+    # being handled in this context. Under ASGI, sync_to_async carries the
+    # context over to the thread the ORM runs the query on.
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.query_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+def watch_connection(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_recording():
+    connection_created.connect(watch_connection, dispatch_uid="request_metrics")
+    # Connections this thread opened before the middleware was loaded
+    for connection in connections.all(initialized_only=True):
+        watch_connection(connection)
+
+
+@contextmanager
+def render_timer():
+    """
+    Count the time spent in the block as rendering time of the request
+    being handled, if any.
+    """
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.render_time += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, query count and time, render time and response size
+    per view. Adds a Server-Timing header, feeds the /metrics
+    histograms and logs requests over REQUEST_METRICS["N_PLUS_ONE_THRESHOLD"]
+    queries. Runs sync under WSGI and async under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_query_recording()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered by the handler once the view returns;
+        # this middleware comes first, so rendering here is the last step
+        with render_timer():
+            return response.render()
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, metrics, total):
+        options = metrics_settings()
+        match = request.resolver_match
+        labels = (match.view_name if match else "<unresolved>", request.method)
+        size = len(response.content) if not response.streaming else 0
+
+        registry.observe("http_request_duration_seconds", labels, total)
+        registry.observe("db_queries_per_request", labels, metrics.queries)
+        registry.observe("db_query_duration_seconds", labels, metrics.query_time)
+        registry.observe("render_duration_seconds", labels, metrics.render_time)
+        registry.observe("http_response_size_bytes", labels, size)
+
+        if metrics.queries > options["N_PLUS_ONE_THRESHOLD"]:
+            registry.increment("n_plus_one_requests_total", labels)
+            logger.warning(
+                "%s %s (%s) ran %d queries, over the N+1 threshold of %d",
+                request.method, request.path, labels[0], metrics.queries, options["N_PLUS_ONE_THRESHOLD"],
+            )
+
+        if options["SERVER_TIMING"]:
+            response["Server-Timing"] = ", ".join([
+                f"total;dur={total * 1000:.1f}",
+                f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f"render;dur={metrics.render_time * 1000:.1f}",
+            ])
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. The scraper must send REQUEST_METRICS["TOKEN"]
+    as a bearer token; with no token configured it is closed.
+    """
+    token = metrics_settings()["TOKEN"]
+    if not token or request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
 import dj_database_url
 from pathlib import Path
 from drf_yasg import openapi
@@ -51,9 +52,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "hello_laundry_apis.metrics.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, made async-capable for ASGI mode
+    "hello_laundry_apis.middleware.AsyncWhiteNoiseMiddleware",
     # 'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,6 +85,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'hello_laundry_apis.wsgi.application'
 
+# "wsgi" (sync gunicorn workers) or "asgi" (uvicorn workers), see
+# gunicorn.conf.py. In ASGI mode the I/O-bound endpoints are routed to
+# their async views.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+ASYNC_VIEWS = SERVER_MODE == "asgi"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -105,14 +114,26 @@ WSGI_APPLICATION = 'hello_laundry_apis.wsgi.application'
 # }
 
 #staging
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///db.sqlite3")
 DATABASES = {
-    "default": dj_database_url.config(
-        default="sqlite:///db.sqlite3",
-        conn_max_age=600,
-        ssl_require=True
+    "default": dj_database_url.parse(
+        DATABASE_URL,
+        # Under ASGI every request runs its sync code on a fresh thread, so
+        # persistent connections would pile up instead of being reused.
+        conn_max_age=0 if SERVER_MODE == "asgi" else 600,
+        # sqlite has no sslmode option; only enforce TLS for network databases.
+        ssl_require=not DATABASE_URL.startswith("sqlite")
     )
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Take the write lock at BEGIN so concurrent checkouts queue on the busy
+    # timeout instead of failing with "database is locked".
+    DATABASES["default"].setdefault("OPTIONS", {}).update({
+        "transaction_mode": "IMMEDIATE",
+        "timeout": 20,
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,15 +179,93 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache shared by every worker: Redis when REDIS_URL is set, otherwise a
+# table in the database (created by migrate, see laundry_app migration
+# 0010). Menu versions, ETags, OTP throttles and the token cache all rely
+# on writes being seen by every process, so per-process LocMem is only
+# used for the test run. Bump CACHE_VERSION to drop everything cached by
+# an older release.
+# The database and LocMem caches cull once they hold MAX_ENTRIES keys
+# (Django's default is 300), oldest keys or 1/CULL_FREQUENCY of the table
+# at a time, version counters included. Size it for a menu snapshot and a
+# version key per laundry, plus tokens and OTP throttles; Redis evicts by
+# its own maxmemory policy instead.
+TESTING = sys.argv[1:2] == ["test"]
+REDIS_URL = os.environ.get("REDIS_URL")
+CACHE_OPTIONS = {
+    "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 100000)),
+    "CULL_FREQUENCY": 10,
+}
+if REDIS_URL:
+    CACHE_BACKEND, CACHE_LOCATION = "django.core.cache.backends.redis.RedisCache", REDIS_URL
+    CACHE_OPTIONS = {}
+elif TESTING:
+    CACHE_BACKEND, CACHE_LOCATION = "django.core.cache.backends.locmem.LocMemCache", "hello-laundry"
+else:
+    CACHE_BACKEND, CACHE_LOCATION = "django.core.cache.backends.db.DatabaseCache", "hello_laundry_cache"
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+        "KEY_PREFIX": "hello_laundry",
+        "VERSION": int(os.environ.get("CACHE_VERSION", 1)),
+        "TIMEOUT": 300,
+        "OPTIONS": CACHE_OPTIONS,
+    }
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Seconds a verified token is trusted without a DB lookup: LOCAL_TTL in the
+# worker's own LRU, SHARED_TTL in Redis. Without Redis there is no shared
+# layer (SHARED_TTL 0) and the local one is kept short, since a revoked
+# token is only forgotten by the worker that handled the revocation.
+TOKEN_AUTH_CACHE = {
+    "LOCAL_TTL": 30 if REDIS_URL else 10,
+    "LOCAL_MAXSIZE": 10000,
+    "SHARED_TTL": 300 if REDIS_URL else 0,
+}
+
+# One-time passwords. Codes, attempts and throttles live in Redis when
+# REDIS_URL is set, in the OTP table otherwise. TTL and SEND_WINDOW are
+# in seconds.
+OTP = {
+    "BACKEND": "accounts.otp.CacheOTPBackend" if REDIS_URL else "accounts.otp.DatabaseOTPBackend",
+    "TTL": 300,
+    "MAX_ATTEMPTS": 5,
+    "SEND_LIMIT": 5,
+    "SEND_WINDOW": 900,
+}
+
+# OTPs are sent by `manage.py run_otp_worker`. Failed sends are retried
+# after RETRY_BACKOFF ** attempts seconds; EAGER sends inside the request
+# instead, for running without a worker. Sent and failed rows are deleted
+# by `manage.py purge_expired_otps` once RETENTION seconds old.
+OTP_DELIVERY = {
+    "EAGER": False,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 2,
+    "LEASE": 60,
+    "RETENTION": 7 * 24 * 3600,
+}
+
+# Per-request timing, see hello_laundry_apis/metrics.py. Requests running
+# more than N_PLUS_ONE_THRESHOLD queries are logged. /metrics needs TOKEN as
+# a bearer token and is closed without one. The Server-Timing header is only
+# sent in DEBUG, unless SERVER_TIMING says otherwise.
+REQUEST_METRICS = {
+    "N_PLUS_ONE_THRESHOLD": int(os.environ.get("N_PLUS_ONE_THRESHOLD", 20)),
+    "SERVER_TIMING": os.environ.get("SERVER_TIMING", str(DEBUG)) == "True",
+    "TOKEN": os.environ.get("METRICS_TOKEN"),
+}
+
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
         "Token": {
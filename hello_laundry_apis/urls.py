@@ -6,6 +6,7 @@ from drf_yasg import openapi
 from rest_framework import permissions
 from django.conf import settings
 from django.conf.urls.static import static
+from .metrics import metrics_view
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -22,6 +23,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
     path('api/', include('laundry_app.urls')),
+    # Prometheus scrape endpoint, see REQUEST_METRICS
+    path('metrics', metrics_view, name='metrics'),
     # Swagger UI
     re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
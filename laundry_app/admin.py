@@ -44,6 +44,7 @@ class LaundryAdmin(admin.ModelAdmin):
     list_filter = ("is_active", "city")
     search_fields = ("name", "city__name")
     filter_horizontal = ("services",)   
+    readonly_fields = ("rating",)
 
 
 @admin.register(ItemPrice)
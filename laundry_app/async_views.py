@@ -0,0 +1,63 @@
+from rest_framework import status
+
+from hello_laundry_apis.async_api import AsyncAPIView
+from .models import IssueCategory, Language, SupportContact
+from .serializers import IssueCategorySerializer, LanguageSerializer, SupportContactSerializer
+from .versioning import acatalogue_etag, ISSUES_VERSION_KEY, LANGUAGES_VERSION_KEY
+
+
+# Async versions of views in laundry_app/views.py, used in ASGI mode
+# (settings.ASYNC_VIEWS). Same requests, responses and ETags.
+
+class LanguageListView(AsyncAPIView):
+
+    async def get_etag(self, request):
+        return await acatalogue_etag(request, LANGUAGES_VERSION_KEY)
+
+    async def get(self, request):
+        languages = [language async for language in Language.objects.filter(is_active=True)]
+        return self.response(LanguageSerializer(languages, many=True).data)
+
+
+class SupportContactView(AsyncAPIView):
+    """
+    Get support contact based on country NAME
+    """
+
+    async def get(self, request):
+        country_name = request.query_params.get("country")
+
+        if not country_name:
+            return self.response(
+                {"message": "country parameter is required"},
+                status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            support = await SupportContact.objects.select_related("country").aget(
+                country__name__iexact=country_name,
+                is_active=True
+            )
+        except SupportContact.DoesNotExist:
+            return self.response(
+                {"message": "Support contact not found"},
+                status.HTTP_404_NOT_FOUND
+            )
+
+        return self.response(SupportContactSerializer(support).data)
+
+
+class IssueCategoryListView(AsyncAPIView):
+    """
+    List predefined issues
+    """
+
+    async def get_etag(self, request):
+        return await acatalogue_etag(request, ISSUES_VERSION_KEY)
+
+    async def get(self, request):
+        issues = [issue async for issue in IssueCategory.objects.filter(is_active=True)]
+        return self.response({
+            "success": True,
+            "data": IssueCategorySerializer(issues, many=True).data
+        })
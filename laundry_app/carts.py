@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Cart, CartItem, ItemPrice
+
+
+class CartUpdateError(Exception):
+    pass
+
+
+def refresh_cart_totals(carts):
+    """
+    Recompute Cart.total for the given carts (a queryset or ids) with a
+    single UPDATE ... SET total = (SELECT SUM(quantity * price) ...).
+    Called from signals on CartItem/ItemPrice writes, and directly after
+    bulk writes that skip signals.
+    """
+    if not hasattr(carts, "update"):
+        carts = Cart.objects.filter(pk__in=carts)
+
+    money = DecimalField(max_digits=10, decimal_places=2)
+    line_total = (
+        CartItem.objects.filter(cart=OuterRef("pk"))
+        .values("cart")
+        .annotate(total=Sum(F("quantity") * F("item_price__price"), output_field=money))
+        .values("total")
+    )
+    return carts.update(
+        total=Coalesce(Subquery(line_total), Value(Decimal("0")), output_field=money)
+    )
+
+
+def add_to_cart(user, laundry_id, service, lines):
+    """
+    Add `lines` ({item_price_id: quantity}) to the user's active cart for
+    this laundry in one transaction, creating the cart if needed.
+    Quantities add up with what is already in the cart. All lines are
+    written with a single INSERT ... ON CONFLICT (cart, item_price)
+    DO UPDATE, whether or not they were in the cart before.
+    """
+    with transaction.atomic():
+        known = set(
+            ItemPrice.objects.filter(laundry_id=laundry_id, pk__in=lines).values_list("pk", flat=True)
+        )
+        unknown = sorted(set(lines) - known)
+        if unknown:
+            raise CartUpdateError(
+                f"Item prices not offered by this laundry: {', '.join(map(str, unknown))}"
+            )
+
+        cart = (
+            Cart.objects.select_for_update()
+            .filter(user=user, laundry_id=laundry_id, is_active=True)
+            .order_by("-created_at")
+            .first()
+        )
+        if cart is None:
+            cart = Cart.objects.create(user=user, laundry_id=laundry_id, service=service)
+
+        in_cart = dict(
+            CartItem.objects.filter(cart=cart, item_price_id__in=lines)
+            .values_list("item_price_id", "quantity")
+        )
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, item_price_id=item_price_id, quantity=in_cart.get(item_price_id, 0) + quantity)
+                for item_price_id, quantity in lines.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["cart", "item_price"],
+            update_fields=["quantity"],
+        )
+        # bulk_create skips the CartItem signals
+        refresh_cart_totals([cart.pk])
+
+    return cart
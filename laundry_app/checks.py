@@ -0,0 +1,23 @@
+from django.core.checks import Error, Tags, register
+
+from hello_laundry_apis.caching import cache_is_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Catalogue ETags, menu snapshots and their version counters live in the
+    default cache. With a per-process cache, a write only bumps the version
+    in the worker that handled it, and the others keep answering 304 or
+    serving old snapshots.
+    """
+    if cache_is_shared():
+        return []
+    return [
+        Error(
+            "The default cache is local to each process, so catalogue versions and ETags "
+            "are not shared between workers.",
+            hint="Set REDIS_URL, or leave it unset to use the database cache (settings.CACHES).",
+            id="laundry_app.E001",
+        )
+    ]
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from functools import cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .models import City, Laundry
+from .serializers import CountryWithCitiesSerializer, LaundrySerializer
+
+# Converter placeholder for file fields, see ValuesSerializer.compiled_columns
+FILE_URL = object()
+
+
+class ValuesSerializer:
+    """
+    Read-only counterpart of a DRF serializer for hot list endpoints.
+    Rows are fetched with `.values()` and turned into dicts directly, with
+    the output of `serializer_class` (same keys, order and formatting).
+
+    The column list is worked out once per class from the DRF serializer's
+    fields: plain fields are copied as they come out of the database,
+    fields with their own formatting (decimals, dates, files) reuse the DRF
+    field's `to_representation`. Fields that can't be read from a single row
+    (many-to-many, nested, method fields) need a `get_<name>(rows)` method
+    returning `{pk: value}` for a batch, or a column in `sources`.
+    """
+    serializer_class = None
+    # Output field -> values() lookup, where it isn't the field's source
+    sources = {}
+
+    # Copied as is; values() already returns the represented type
+    PLAIN_FIELDS = (
+        serializers.CharField,
+        serializers.IntegerField,
+        serializers.BooleanField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.model = self.serializer_class.Meta.model
+        self.columns = [
+            (name, lookup, self.file_url(lookup) if convert is FILE_URL else convert)
+            for name, lookup, convert in self.compiled_columns()
+        ]
+        self.batch_fields = [
+            (name, getattr(self, f"get_{name}")) for name, lookup, _ in self.columns if lookup is None
+        ]
+
+    @classmethod
+    @cache
+    def compiled_columns(cls):
+        """
+        (name, lookup, convert) per output field, worked out once per class.
+        `lookup` is None for batch fields. File fields get FILE_URL, made
+        into a converter per instance since URLs depend on the request.
+        """
+        columns = []
+        for name, field in cls.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if hasattr(cls, f"get_{name}"):
+                columns.append((name, None, None))
+            elif name in cls.sources:
+                columns.append((name, cls.sources[name], None))
+            else:
+                lookup = field.source.replace(".", "__")
+                columns.append((name, lookup, cls.converter(name, field)))
+        return columns
+
+    @classmethod
+    def converter(cls, name, field):
+        if isinstance(field, serializers.FileField):
+            return FILE_URL
+        if isinstance(field, cls.PLAIN_FIELDS):
+            return None
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                              serializers.RelatedField, serializers.SerializerMethodField)):
+            raise ImproperlyConfigured(
+                f"{cls.__name__} needs get_{name}(rows) or sources[{name!r}]"
+            )
+        return field.to_representation
+
+    def file_url(self, lookup):
+        # values() gives the stored name rather than a FieldFile
+        storage = self.model._meta.get_field(lookup).storage
+        request = self.context.get("request")
+
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+
+    def values(self, queryset):
+        """
+        The rows to pass to `to_representation`, as a values() queryset
+        (still lazy, so it can be paginated).
+        """
+        lookups = {"pk"} | {lookup for _, lookup, _ in self.columns if lookup}
+        # Keyset pagination reads the ordering column from each row
+        ordering = queryset.query.order_by or self.model._meta.ordering
+        lookups |= {term.lstrip("-") for term in ordering if isinstance(term, str)}
+        return queryset.select_related(None).prefetch_related(None).values(*lookups)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        batch = {name: get(rows) for name, get in self.batch_fields}
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, convert in self.columns:
+                if lookup is None:
+                    item[name] = batch[name].get(row["pk"])
+                else:
+                    value = row[lookup]
+                    item[name] = convert(value) if convert is not None and value is not None else value
+            data.append(item)
+        return data
+
+    def many(self, queryset):
+        return self.to_representation(self.values(queryset))
+
+
+class LaundryValuesSerializer(ValuesSerializer):
+    serializer_class = LaundrySerializer
+
+    def get_services(self, rows):
+        services = defaultdict(list)
+        links = (
+            Laundry.services.through.objects
+            .filter(laundry_id__in=[row["pk"] for row in rows])
+            # Same order as LaundrySerializer's services Prefetch
+            .order_by("service_id")
+            .values_list("laundry_id", "service__name")
+        )
+        for laundry_id, name in links:
+            services[laundry_id].append(name)
+        return {row["pk"]: services[row["pk"]] for row in rows}
+
+
+class CountryValuesSerializer(ValuesSerializer):
+    serializer_class = CountryWithCitiesSerializer
+
+    def get_cities(self, rows):
+        cities = defaultdict(list)
+        for city in City.objects.filter(country_id__in=[row["pk"] for row in rows]).values("country_id", "id", "name"):
+            cities[city.pop("country_id")].append(city)
+        return {row["pk"]: cities[row["pk"]] for row in rows}
+
+
+class ValuesListMixin:
+    """
+    Opts a ListAPIView into a ValuesSerializer: filtering and pagination
+    work as before, but rows are read with values() instead of being
+    turned into model instances and walked field by field.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class(context=self.get_serializer_context())
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(rows))
@@ -0,0 +1,52 @@
+import hashlib
+
+import django_filters
+
+from hello_laundry_apis.caching import get_or_compute, make_key
+
+from .models import City, Laundry
+from .versioning import LOCATIONS_VERSION_KEY, get_version
+
+CITY_IDS_CACHE_TIMEOUT = 60 * 60
+
+
+def normalize_city_name(name):
+    return " ".join(name.split()).casefold()
+
+
+def resolve_city_ids(name, partial=False):
+    """
+    Ids of the cities matching `name`, cached until a City or Country
+    changes. Filtering laundries by these ids lets the database use the
+    (city, is_active, ...) indexes instead of joining City on every
+    request.
+    """
+    name = normalize_city_name(name)
+    lookup = "icontains" if partial else "iexact"
+    digest = hashlib.md5(name.encode()).hexdigest()
+    key = make_key("cities", "ids", lookup, digest, get_version(LOCATIONS_VERSION_KEY))
+    return get_or_compute(
+        key,
+        lambda: list(City.objects.filter(**{f"name__{lookup}": name}).values_list("id", flat=True)),
+        CITY_IDS_CACHE_TIMEOUT,
+    )
+
+
+class LaundryFilter(django_filters.FilterSet):
+    city_id = django_filters.NumberFilter(field_name="city_id")
+    city_name = django_filters.CharFilter(method="filter_city_name")
+    # Kept for older app versions; resolved through the same id lookup.
+    city__name__icontains = django_filters.CharFilter(method="filter_city_name_contains")
+
+    class Meta:
+        model = Laundry
+        fields = {
+            'rating': ['gte', 'lte'],
+            'starting_price': ['gte', 'lte'],
+        }
+
+    def filter_city_name(self, queryset, name, value):
+        return queryset.filter(city_id__in=resolve_city_ids(value))
+
+    def filter_city_name_contains(self, queryset, name, value):
+        return queryset.filter(city_id__in=resolve_city_ids(value, partial=True))
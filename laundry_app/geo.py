@@ -0,0 +1,88 @@
+import heapq
+import math
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Laundries are bucketed into a fixed lat/lng grid (about 11km per cell
+# at the equator). Cells are numbered row by row, so the cells of one
+# grid row inside a bounding box form a single contiguous range.
+GEO_CELL_DEGREES = 0.1
+GEO_GRID_ROWS = int(180 / GEO_CELL_DEGREES)
+GEO_GRID_COLS = int(360 / GEO_CELL_DEGREES)
+
+
+def _row(lat):
+    return min(max(int((lat + 90) // GEO_CELL_DEGREES), 0), GEO_GRID_ROWS - 1)
+
+
+def _col(lng):
+    return int((lng + 180) // GEO_CELL_DEGREES) % GEO_GRID_COLS
+
+
+def geo_cell(lat, lng):
+    if lat is None or lng is None:
+        return None
+    return _row(float(lat)) * GEO_GRID_COLS + _col(float(lng))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def geo_cell_ranges(lat, lng, radius_km):
+    """
+    Inclusive `(first, last)` cell ranges covering every point within
+    `radius_km` of `(lat, lng)`.
+    """
+    lat, lng = float(lat), float(lng)
+    lat_delta = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; size the box for the
+    # latitude furthest from the equator.
+    widest_lat = min(abs(lat) + lat_delta, 89.9)
+    lng_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest_lat)))
+
+    first_row, last_row = _row(lat - lat_delta), _row(lat + lat_delta)
+    if lng_delta * 2 >= 360:
+        col_spans = [(0, GEO_GRID_COLS - 1)]
+    else:
+        first_col, last_col = _col(lng - lng_delta), _col(lng + lng_delta)
+        if first_col <= last_col:
+            col_spans = [(first_col, last_col)]
+        else:
+            # Box crosses the antimeridian
+            col_spans = [(first_col, GEO_GRID_COLS - 1), (0, last_col)]
+
+    return [
+        (row * GEO_GRID_COLS + first, row * GEO_GRID_COLS + last)
+        for row in range(first_row, last_row + 1)
+        for first, last in col_spans
+    ]
+
+
+def nearest(queryset, lat, lng, radius_km, limit):
+    """
+    `(distance_km, pk)` pairs for the `limit` rows of `queryset` closest
+    to `(lat, lng)` and within `radius_km`, nearest first. The grid cell
+    index prunes candidates in the database; exact distances are only
+    computed for what is left.
+    """
+    in_cells = Q()
+    for first, last in geo_cell_ranges(lat, lng, radius_km):
+        in_cells |= Q(geo_cell__range=(first, last))
+
+    candidates = queryset.filter(in_cells).values_list("pk", "latitude", "longitude")
+    distances = (
+        (haversine_km(lat, lng, row_lat, row_lng), pk)
+        for pk, row_lat, row_lng in candidates
+    )
+    return heapq.nsmallest(
+        limit, (pair for pair in distances if pair[0] <= radius_km)
+    )
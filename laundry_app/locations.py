@@ -0,0 +1,51 @@
+from hello_laundry_apis.caching import get_or_compute, make_key
+
+from .fast_serializers import CountryValuesSerializer
+from .filters import normalize_city_name
+from .models import Country
+from .versioning import LOCATIONS_VERSION_KEY, get_version
+
+LOCATION_TREE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# (version, tree) of the last tree this process loaded. Replaced as a
+# whole, so concurrent requests never see a half-built tree.
+_local_tree = (None, None)
+
+
+def build_location_tree():
+    """
+    Every country with its cities, in the shape returned by
+    CountryWithCitiesSerializer, plus the same entries keyed by
+    normalized country name. Costs two queries.
+    """
+    data = CountryValuesSerializer().many(Country.objects.all())
+    return {
+        "countries": data,
+        "by_name": {normalize_city_name(country["name"]): country for country in data},
+    }
+
+
+def get_location_tree():
+    """
+    The location tree for the current locations version: from process
+    memory, else the shared cache, else rebuilt. City and Country writes
+    bump the version (see signals.py), which retires both copies.
+    """
+    global _local_tree
+    version = get_version(LOCATIONS_VERSION_KEY)
+    local_version, tree = _local_tree
+    if local_version == version:
+        return tree
+
+    tree = get_or_compute(make_key("locations", "tree", version), build_location_tree, LOCATION_TREE_CACHE_TIMEOUT)
+    _local_tree = (version, tree)
+    return tree
+
+
+def clear_local_tree():
+    global _local_tree
+    _local_tree = (None, None)
+
+
+def get_country(name):
+    return get_location_tree()["by_name"].get(normalize_city_name(name))
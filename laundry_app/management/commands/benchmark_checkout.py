@@ -0,0 +1,103 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from accounts.models import User
+from laundry_app.models import Cart, CartItem, Category, City, Country, Item, ItemPrice, Laundry, Order, Service
+from laundry_app.orders import OrderPlacementError, place_order
+
+#python manage.py benchmark_checkout --carts 500 --workers 8
+class Command(BaseCommand):
+    help = (
+        "Place orders for many carts from concurrent threads, submitting every "
+        "cart twice, and report throughput. The rows this run creates are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--carts", type=int, default=500)
+        parser.add_argument("--lines", type=int, default=15)
+        parser.add_argument("--workers", type=int, default=8)
+
+    def handle(self, *args, **options):
+        # Orders are placed from worker threads, each on its own connection,
+        # so the run can't be rolled back. Instead it tags what it creates
+        # and deletes exactly those rows.
+        self.tag = uuid.uuid4().hex[:5].upper()
+        self.created = []
+        try:
+            carts = self.create_carts(options["carts"], options["lines"])
+            self.run(carts, options["workers"])
+        finally:
+            for rows in reversed(self.created):
+                rows.delete()
+
+    def create(self, model, **fields):
+        obj = model.objects.create(**fields)
+        self.created.append(obj)
+        return obj
+
+    def create_carts(self, count, lines):
+        name = f"Benchmark {self.tag}"
+        country = self.create(
+            Country, name=name, country_code=self.tag, currency_name="-", currency_code="ZZZ"
+        )
+        # City, laundry, item prices, carts and orders go with the country
+        city = City.objects.create(country=country, name=name)
+        laundry = Laundry.objects.create(name=name, city=city)
+        service = self.create(Service, name=name, starting_price=1)
+        category = self.create(Category, name=name)
+        items = Item.objects.bulk_create(
+            Item(category=category, name=f"Item {i}") for i in range(lines)
+        )
+        prices = ItemPrice.objects.bulk_create(
+            ItemPrice(laundry=laundry, item=item, price=Decimal("5.00")) for item in items
+        )
+
+        users = User.objects.bulk_create(
+            User(mobile=f"bench{self.tag}{i}", password="!") for i in range(count)
+        )
+        self.created.append(User.objects.filter(pk__in=[user.pk for user in users]))
+        carts = Cart.objects.bulk_create(
+            Cart(user=user, laundry=laundry, service=service) for user in users
+        )
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, item_price=price, quantity=2)
+            for cart in carts for price in prices
+        )
+        return carts
+
+    def run(self, carts, workers):
+        def checkout(cart):
+            try:
+                place_order(cart.user, cart_id=cart.id)
+                return "placed"
+            except OrderPlacementError:
+                return "rejected"
+            except Exception as ex:
+                return type(ex).__name__
+            finally:
+                connections.close_all()
+
+        # Every cart is submitted twice, as if the customer double-tapped
+        attempts = [cart for cart in carts for _ in range(2)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(checkout, attempts))
+        elapsed = time.perf_counter() - start
+
+        placed = outcomes.count("placed")
+        orders = Order.objects.filter(cart__in=carts).count()
+        self.stdout.write(
+            f"{len(carts)} carts, {len(attempts)} checkouts, {workers} workers\n"
+            f"{placed / elapsed:.1f} orders/sec ({elapsed:.2f}s)\n"
+            f"placed {placed}, rejected duplicates {outcomes.count('rejected')}, "
+            f"errors {len(outcomes) - placed - outcomes.count('rejected')}"
+        )
+        if orders != placed or placed > len(carts):
+            self.stderr.write(self.style.ERROR(f"Expected at most one order per cart, found {orders}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No cart was ordered twice"))
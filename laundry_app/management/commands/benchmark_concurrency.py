@@ -0,0 +1,133 @@
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts.models import User
+from laundry_app.management.commands.benchmark_endpoints import percentile
+from laundry_app.management.commands.generate_synthetic_data import MOBILE_PREFIX
+from laundry_app.models import SupportContact
+
+ENDPOINTS = ["languages", "issues", "support_contact", "send_otp"]
+
+
+#SERVER_MODE=wsgi PORT=8000 gunicorn --config gunicorn.conf.py
+#SERVER_MODE=asgi PORT=8001 gunicorn --config gunicorn.conf.py
+#python manage.py benchmark_concurrency --target sync=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001
+class Command(BaseCommand):
+    help = (
+        "Load already running servers with N concurrent keep-alive connections per endpoint and "
+        "report throughput and latency, e.g. the same code started in sync (WSGI) and ASGI mode "
+        "against this database. Creates a benchmark user and token, and send_otp queues OTP "
+        f"deliveries for mobiles starting {MOBILE_PREFIX}; both are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, metavar="NAME=URL",
+                            help="Server to load; the first one is the baseline for the speedup column")
+        parser.add_argument("--endpoint", action="append", choices=ENDPOINTS, help="Default: all")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64],
+                            help="Concurrent connections; one run per value")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per run")
+        parser.add_argument("--json", help="Write the report to this file")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep or not url.startswith("http"):
+                raise CommandError(f"--target should look like sync=http://127.0.0.1:8000, not {target!r}")
+            targets.append((name, url.rstrip("/")))
+
+        user, _ = User.objects.get_or_create(mobile=f"{MOBILE_PREFIX}999999999")
+        self.headers = {"Authorization": f"Token {Token.objects.get_or_create(user=user)[0].key}"}
+        self.country = (
+            SupportContact.objects.filter(is_active=True).values_list("country__name", flat=True).first()
+        )
+        # Every send_otp needs a fresh contact, or the per-contact throttle kicks in
+        self.mobiles = itertools.count(random.randrange(10**8))
+
+        endpoints = options["endpoint"] or ENDPOINTS
+        if "support_contact" in endpoints and self.country is None:
+            self.stderr.write("No active support contact; skipping support_contact")
+            endpoints = [name for name in endpoints if name != "support_contact"]
+
+        report = []
+        self.stdout.write(
+            f"{'endpoint':<16}{'conc':>6}{'target':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'errors':>8}{'speedup':>9}"
+        )
+        for endpoint in endpoints:
+            for concurrency in options["concurrency"]:
+                baseline = None
+                for name, url in targets:
+                    row = {"endpoint": endpoint, "concurrency": concurrency, "target": name,
+                           **self.load(url, endpoint, concurrency, options["duration"])}
+                    baseline = baseline or row["requests_per_second"]
+                    speedup = row["requests_per_second"] / baseline if baseline else 0
+                    report.append(row)
+                    self.stdout.write(
+                        f"{endpoint:<16}{concurrency:>6}{name:>10}{row['requests_per_second']:>10.1f}"
+                        f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['errors']:>8}{speedup:>8.2f}x"
+                    )
+
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(report, f, indent=2)
+
+    def load(self, url, endpoint, concurrency, duration):
+        """
+        Keep `concurrency` connections busy with `endpoint` for `duration`
+        seconds.
+        """
+        request = getattr(self, f"request_{endpoint}")
+        start = threading.Barrier(concurrency)
+
+        def connection():
+            session = requests.Session()
+            session.headers.update(self.headers)
+            samples = []
+            start.wait()
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    ok = request(session, url).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                samples.append(((time.perf_counter() - sent) * 1000, ok))
+            session.close()
+            return samples
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [s for result in pool.map(lambda _: connection(), range(concurrency)) for s in result]
+
+        timings = sorted(elapsed for elapsed, _ in samples)
+        return {
+            "requests": len(samples),
+            "requests_per_second": round(len(samples) / duration, 1),
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "errors": sum(1 for _, ok in samples if not ok),
+        }
+
+    # Endpoints: each sends one request over `session`
+
+    def request_languages(self, session, url):
+        return session.get(url + reverse("language-list"))
+
+    def request_issues(self, session, url):
+        return session.get(url + reverse("issue-list"))
+
+    def request_support_contact(self, session, url):
+        return session.get(url + reverse("support-contact"), params={"country": self.country})
+
+    def request_send_otp(self, session, url):
+        return session.post(url + reverse("send_otp"), json={"mobile": f"{MOBILE_PREFIX}{next(self.mobiles):09d}"})
@@ -0,0 +1,185 @@
+import json
+import random
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from laundry_app.carts import add_to_cart
+from laundry_app.models import ItemPrice, Laundry, Service
+
+SCENARIOS = ["laundry_list", "menu", "add_to_cart", "place_order", "otp_login"]
+BENCHMARK_OTP = "424242"
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0
+    index = max(int(round(q / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+#python manage.py generate_synthetic_data --users 1000 --laundries 500 --orders 10000
+#python manage.py benchmark_endpoints --requests 200 --json report.json --baseline main.json
+class Command(BaseCommand):
+    help = (
+        "Drive the real endpoints through the test client against the laundries already in the "
+        "database (see generate_synthetic_data), and report p50/p95/p99 latency and queries per "
+        "request. Everything written is rolled back. With --baseline, fails when p95 or queries "
+        "per request got worse than a previous --json report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario")
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Default: all")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", help="Write the report to this file")
+        parser.add_argument("--baseline", help="Report from an earlier run to compare against")
+        parser.add_argument("--tolerance", type=float, default=20, help="Allowed p95 slowdown, in percent")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        laundries = list(
+            Laundry.objects.filter(is_active=True, item_prices__isnull=False)
+            .distinct().values_list("pk", "city_id")[:200]
+        )
+        if not laundries:
+            raise CommandError("No laundries with prices; run generate_synthetic_data first")
+
+        report = {}
+        with transaction.atomic():
+            self.setup(laundries)
+            for name in options["scenario"] or SCENARIOS:
+                run = getattr(self, f"run_{name}")
+                for _ in range(options["warmup"]):
+                    run()
+                samples = [self.measure(run) for _ in range(options["requests"])]
+                report[name] = self.summarize(samples)
+            transaction.set_rollback(True)
+
+        self.print_report(report)
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(report, f, indent=2)
+        if options["baseline"]:
+            self.compare(report, options["baseline"], options["tolerance"])
+
+    def setup(self, laundries):
+        self.laundries = laundries
+        self.prices = {
+            laundry_id: list(ItemPrice.objects.filter(laundry_id=laundry_id).values_list("pk", flat=True)[:50])
+            for laundry_id, _ in laundries
+        }
+        self.service = Service.objects.filter(is_active=True).first() or Service.objects.create(
+            name="Benchmark", starting_price=10
+        )
+        self.user = User.objects.create_user(mobile="099999999")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+        self.mobiles = iter(range(10**8))
+
+    def measure(self, run):
+        elapsed, queries, response = run()
+        if response.status_code >= 400:
+            raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}: {response.data}")
+        return elapsed, queries
+
+    def timed(self, method, *args, **kwargs):
+        """
+        One request: (milliseconds, queries, response).
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(self.client, method)(*args, **kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, len(queries), response
+
+    def summarize(self, samples):
+        timings = sorted(elapsed for elapsed, _ in samples)
+        queries = [count for _, count in samples]
+        return {
+            "requests": len(samples),
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+            "max_ms": round(timings[-1], 2),
+            "queries_mean": round(sum(queries) / len(queries), 2),
+            "queries_max": max(queries),
+        }
+
+    # Scenarios: each returns (ms, queries, response) for the timed request(s)
+
+    def laundry(self):
+        return self.rng.choice(self.laundries)
+
+    def run_laundry_list(self):
+        _, city_id = self.laundry()
+        return self.timed("get", reverse("laundry-list-by-city"), {"city_id": city_id, "ordering": "-rating"})
+
+    def run_menu(self):
+        laundry_id, _ = self.laundry()
+        return self.timed("get", reverse("laundry-items", args=[laundry_id]))
+
+    def run_add_to_cart(self):
+        laundry_id, _ = self.laundry()
+        return self.timed("post", reverse("add-to-cart"), {
+            "laundry": laundry_id,
+            "service": self.service.pk,
+            "item_price": self.rng.choice(self.prices[laundry_id]),
+        }, format="json")
+
+    def run_place_order(self):
+        laundry_id, _ = self.laundry()
+        lines = self.rng.sample(self.prices[laundry_id], min(3, len(self.prices[laundry_id])))
+        cart = add_to_cart(self.user, laundry_id, self.service, {pk: 1 for pk in lines})
+        return self.timed("post", reverse("place-order"), {"cart": cart.pk}, format="json")
+
+    def run_otp_login(self):
+        mobile = f"09{next(self.mobiles):08d}"
+        with mock.patch("accounts.utils.generate_otp", return_value=BENCHMARK_OTP):
+            sent_ms, sent_queries, response = self.timed("post", reverse("send_otp"), {"mobile": mobile}, format="json")
+        if response.status_code >= 400:
+            return sent_ms, sent_queries, response
+        verify_ms, verify_queries, response = self.timed(
+            "post", reverse("verify_otp"), {"mobile": mobile, "otp": BENCHMARK_OTP}, format="json"
+        )
+        return sent_ms + verify_ms, sent_queries + verify_queries, response
+
+    # Output
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'scenario':<14}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'queries':>10}"
+        )
+        for name, row in report.items():
+            self.stdout.write(
+                f"{name:<14}{row['requests']:>6}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}{row['queries_mean']:>7.1f}/{row['queries_max']:<2}"
+            )
+
+    def compare(self, report, path, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, row in report.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            if row["queries_max"] > before["queries_max"]:
+                regressions.append(f"{name}: {before['queries_max']} -> {row['queries_max']} queries per request")
+            if row["p95_ms"] > before["p95_ms"] * (1 + tolerance / 100):
+                regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {row['p95_ms']}ms")
+        if regressions:
+            raise CommandError("Regressions against baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from laundry_app.geo import geo_cell, nearest
+from laundry_app.models import City, Country, Laundry
+
+#python manage.py benchmark_nearby --laundries 50000
+class Command(BaseCommand):
+    help = "Time nearest-laundry lookups against a throwaway set of synthetic laundries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--laundries", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--radius-km", type=float, default=10)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        # Everything is rolled back at the end, so this is safe on a dev database.
+        # The unique tag keeps the country from clashing with rows already there.
+        tag = uuid.uuid4().hex[:5].upper()
+        with transaction.atomic():
+            country = Country.objects.create(
+                name=f"Benchmark {tag}", country_code=tag, currency_name="-", currency_code="ZZZ"
+            )
+            city = City.objects.create(country=country, name=f"Benchmark {tag}")
+
+            # Spread over the GCC, roughly 16N-30N / 46E-60E
+            laundries = []
+            for i in range(options["laundries"]):
+                lat, lng = round(rng.uniform(16, 30), 6), round(rng.uniform(46, 60), 6)
+                laundries.append(Laundry(
+                    name=f"Laundry {i}", city=city,
+                    latitude=lat, longitude=lng, geo_cell=geo_cell(lat, lng),
+                ))
+            Laundry.objects.bulk_create(laundries, batch_size=2000)
+
+            queryset = Laundry.objects.filter(is_active=True)
+            timings = []
+            for _ in range(options["queries"]):
+                lat, lng = rng.uniform(16, 30), rng.uniform(46, 60)
+                start = time.perf_counter()
+                nearest(queryset, lat, lng, options["radius_km"], 20)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        self.stdout.write(
+            f"{options['laundries']} laundries, {options['queries']} queries, "
+            f"radius {options['radius_km']}km\n"
+            f"p50 {statistics.median(timings):.2f}ms  "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f}ms  "
+            f"max {timings[-1]:.2f}ms"
+        )
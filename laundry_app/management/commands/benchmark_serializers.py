@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from laundry_app.fast_serializers import CountryValuesSerializer, LaundryValuesSerializer
+from laundry_app.models import Country, Laundry
+
+#python manage.py benchmark_serializers --rows 1000
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the DRF serializers and their values() counterparts on the "
+        "data already in the database (see generate_synthetic_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per serialization")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        if not Laundry.objects.exists():
+            raise CommandError("No laundries; run generate_synthetic_data first")
+
+        context = {"request": APIRequestFactory().get("/")}
+        cases = [
+            ("laundries", LaundryValuesSerializer, Laundry.objects.order_by("pk")[:rows]),
+            ("countries", CountryValuesSerializer, Country.objects.order_by("pk")[:rows]),
+        ]
+
+        self.stdout.write(f"{'serializer':<18}{'rows':>7}{'DRF rows/s':>14}{'values rows/s':>15}{'speedup':>9}")
+        for label, values_serializer, queryset in cases:
+            serializer_class = values_serializer.serializer_class
+            eager = getattr(serializer_class, "setup_eager_loading", lambda qs: qs)
+
+            drf = self.best(repeat, lambda: serializer_class(eager(queryset), many=True, context=context).data)
+            fast = self.best(repeat, lambda: values_serializer(context).many(queryset))
+            count = queryset.count()
+            self.stdout.write(
+                f"{label:<18}{count:>7}{count / drf:>14.0f}{count / fast:>15.0f}{drf / fast:>8.1f}x"
+            )
+
+    def best(self, repeat, serialize):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,186 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import User
+from laundry_app.geo import geo_cell
+from laundry_app.models import (
+    ORDER_STATUS, PAYMENT_STATUS, City, Country, ItemPrice, Laundry, LaundryReview, Order, OrderItem, Service,
+)
+from laundry_app.ratings import recompute_ratings
+from laundry_app.search import index_objects
+from laundry_app.seeding import load_items
+
+COUNTRY_CODE = "ZY"
+MOBILE_PREFIX = "000"
+CITIES = ["Synthetic North", "Synthetic Central", "Synthetic South", "Synthetic West", "Synthetic East"]
+CATEGORIES = ["Shirts", "Trousers", "Dresses", "Suits", "Traditional", "Bedding", "Curtains", "Kids", "Sports", "Shoes"]
+SERVICES = ["Wash & Fold", "Dry Clean", "Ironing", "Express"]
+
+#python manage.py generate_synthetic_data --users 100000 --laundries 10000 --items-per-category 10 --orders 5000000
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, laundries, price lists and orders for "
+        "load testing. Meant for a scratch database: rows are tagged (country code ZY, "
+        "mobiles starting 000) but never cleaned up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--laundries", type=int, default=10000)
+        parser.add_argument("--items-per-category", type=int, default=10,
+                            help="Every laundry prices every item: laundries x 10 categories x this")
+        parser.add_argument("--reviews-per-laundry", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=5000000)
+        parser.add_argument("--lines-per-order", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        if Country.objects.filter(country_code=COUNTRY_CODE).exists():
+            raise CommandError("Synthetic data already exists in this database")
+        if options["orders"] and not (options["users"] and options["laundries"]):
+            raise CommandError("Orders need at least one user and one laundry")
+        if options["reviews_per_laundry"] and options["laundries"] and not options["users"]:
+            raise CommandError("Reviews need at least one user")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            self.step("users", self.create_users, options["users"])
+            self.step("laundries", self.create_laundries, options["laundries"])
+            self.step("reviews", self.create_reviews, options["reviews_per_laundry"])
+            self.step("item prices", self.create_prices, options["items_per_category"])
+        # Orders are committed batch by batch; millions of rows don't fit one transaction well
+        self.step("orders", self.create_orders, options["orders"], options["lines_per_order"])
+
+    def step(self, label, create, *args):
+        start = time.perf_counter()
+        count = create(*args)
+        self.stdout.write(f"{count} {label} in {time.perf_counter() - start:.1f}s")
+
+    def create_users(self, count):
+        for offset in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(mobile=f"{MOBILE_PREFIX}{i:09d}", full_name=f"Customer {i}", password="!")
+                for i in range(offset, min(offset + self.batch_size, count))
+            ])
+        self.user_ids = list(User.objects.filter(mobile__startswith=MOBILE_PREFIX).values_list("pk", flat=True))
+        return count
+
+    def create_laundries(self, count):
+        country = Country.objects.create(
+            name="Synthetic", country_code=COUNTRY_CODE, currency_name="Synthetic Riyal", currency_code="ZYR"
+        )
+        cities = City.objects.bulk_create([City(country=country, name=name) for name in CITIES])
+        services = [
+            Service.objects.get_or_create(name=name, defaults={"starting_price": 10 + 5 * i})[0]
+            for i, name in enumerate(SERVICES)
+        ]
+
+        laundries = []
+        for i in range(count):
+            lat, lng = round(self.rng.uniform(25.1, 25.5), 6), round(self.rng.uniform(51.3, 51.6), 6)
+            laundries.append(Laundry(
+                name=f"{self.rng.choice(['Fresh', 'Clean', 'Sparkle', 'Royal', 'Quick'])} Laundry {i}",
+                city=self.rng.choice(cities),
+                address=f"Street {self.rng.randint(1, 999)}",
+                latitude=lat,
+                longitude=lng,
+                geo_cell=geo_cell(lat, lng),
+                starting_price=self.rng.randint(5, 30),
+            ))
+        self.laundries = laundries = Laundry.objects.bulk_create(laundries, batch_size=self.batch_size)
+
+        Through = Laundry.services.through
+        Through.objects.bulk_create(
+            [
+                Through(laundry_id=laundry.pk, service_id=service.pk)
+                for laundry in laundries
+                for service in self.rng.sample(services, self.rng.randint(1, len(services)))
+            ],
+            batch_size=self.batch_size,
+        )
+        index_objects(Laundry.objects.filter(city__country=country).select_related("city"), self.batch_size)
+        return count
+
+    def create_reviews(self, per_laundry):
+        ratings = [Decimal(rating) / 2 for rating in range(2, 11)]
+        laundries_per_batch = max(self.batch_size // max(per_laundry, 1), 1)
+        count = 0
+        for start in range(0, len(self.laundries), laundries_per_batch):
+            batch = self.laundries[start:start + laundries_per_batch]
+            reviews = LaundryReview.objects.bulk_create([
+                LaundryReview(laundry=laundry, customer_id=self.rng.choice(self.user_ids), rating=self.rng.choice(ratings))
+                for laundry in batch
+                for _ in range(per_laundry)
+            ])
+            count += len(reviews)
+        # bulk_create skips the review signals, so fill the counters in one pass
+        recompute_ratings(Laundry.objects.filter(city__country__country_code=COUNTRY_CODE))
+        return count
+
+    def create_prices(self, items_per_category):
+        item_ids = load_items(
+            [{"category": category, "name": f"{category} {i}"} for category in CATEGORIES for i in range(items_per_category)],
+            self.batch_size,
+        )
+        base_prices = {item_id: Decimal(self.rng.randint(3, 40)) for item_id in item_ids.values()}
+
+        markups = [Decimal("0"), Decimal("0.5"), Decimal("1"), Decimal("2")]
+        laundries_per_batch = max(self.batch_size // len(base_prices), 1)
+        count = 0
+        for start in range(0, len(self.laundries), laundries_per_batch):
+            batch = self.laundries[start:start + laundries_per_batch]
+            ItemPrice.objects.bulk_create([
+                ItemPrice(laundry=laundry, item_id=item_id, price=base + self.rng.choice(markups))
+                for laundry in batch
+                for item_id, base in base_prices.items()
+            ])
+            count += len(batch) * len(base_prices)
+
+        # Kept in memory to pick order lines from
+        self.prices = prices = {}
+        for pk, laundry_id, price in ItemPrice.objects.filter(
+            laundry__city__country__country_code=COUNTRY_CODE
+        ).values_list("pk", "laundry_id", "price").iterator(chunk_size=self.batch_size):
+            prices.setdefault(laundry_id, []).append((pk, price))
+        return count
+
+    def create_orders(self, count, lines_per_order):
+        user_ids, prices = self.user_ids, self.prices
+        laundry_ids = list(prices)
+        statuses = [status for status, _ in ORDER_STATUS]
+        payment_statuses = [status for status, _ in PAYMENT_STATUS]
+
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            lines = []
+            orders = []
+            for _ in range(size):
+                laundry_id = self.rng.choice(laundry_ids)
+                order_lines = [
+                    (pk, price, self.rng.randint(1, 5))
+                    for pk, price in self.rng.sample(prices[laundry_id], min(lines_per_order, len(prices[laundry_id])))
+                ]
+                orders.append(Order(
+                    user_id=self.rng.choice(user_ids),
+                    laundry_id=laundry_id,
+                    status=self.rng.choice(statuses),
+                    payment_status=self.rng.choice(payment_statuses),
+                    total_price=sum(price * quantity for _, price, quantity in order_lines),
+                ))
+                lines.append(order_lines)
+
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order_id=order.pk, item_price_id=pk, price=price, quantity=quantity)
+                    for order, order_lines in zip(orders, lines)
+                    for pk, price, quantity in order_lines
+                ])
+        return count
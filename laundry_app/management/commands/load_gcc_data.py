@@ -1,32 +1,81 @@
-from django.core.management.base import BaseCommand
-from locations.models import Country, City
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from laundry_app.models import Laundry
+from laundry_app.seeding import (
+    SeedDataError, load_categories, load_cities, load_countries, load_items, load_price_sheet, read_rows,
+)
+
+GCC_COUNTRIES = [
+    {"name": "Qatar", "country_code": "QA", "currency_name": "Qatari Riyal", "currency_code": "QAR", "currency_symbol": "ر.ق"},
+    {"name": "United Arab Emirates", "country_code": "AE", "currency_name": "UAE Dirham", "currency_code": "AED", "currency_symbol": "د.إ"},
+    {"name": "Saudi Arabia", "country_code": "SA", "currency_name": "Saudi Riyal", "currency_code": "SAR", "currency_symbol": "ر.س"},
+    {"name": "Kuwait", "country_code": "KW", "currency_name": "Kuwaiti Dinar", "currency_code": "KWD", "currency_symbol": "د.ك"},
+    {"name": "Oman", "country_code": "OM", "currency_name": "Omani Rial", "currency_code": "OMR", "currency_symbol": "ر.ع."},
+    {"name": "Bahrain", "country_code": "BH", "currency_name": "Bahraini Dinar", "currency_code": "BHD", "currency_symbol": "د.ب"},
+]
+
+GCC_CITIES = {
+    "QA": ["Doha", "Al Wakrah", "Al Khor", "Al Rayyan"],
+    "AE": ["Dubai", "Abu Dhabi", "Sharjah"],
+    "SA": ["Riyadh", "Jeddah", "Dammam"],
+    "KW": ["Kuwait City", "Salmiya", "Hawalli"],
+    "OM": ["Muscat", "Salalah", "Sohar"],
+    "BH": ["Manama", "Muharraq"],
+}
 
 #python manage.py load_gcc_data
+#python manage.py load_gcc_data --items items.csv --prices prices.csv --laundry 12
 class Command(BaseCommand):
-    help = "Load GCC countries and their main cities into the database"
+    help = (
+        "Load GCC countries and cities, or countries, cities, categories, items and a "
+        "laundry's price sheet from CSV/JSON files. Safe to run repeatedly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--countries", help="name, country_code, currency_name, currency_code, currency_symbol")
+        parser.add_argument("--cities", help="country (name or code), name")
+        parser.add_argument("--categories", help="name")
+        parser.add_argument("--items", help="category, name")
+        parser.add_argument("--prices", help="category, item, price; needs --laundry")
+        parser.add_argument("--laundry", type=int, help="Laundry ID the price sheet belongs to")
+        parser.add_argument("--batch-size", type=int, default=1000)
 
     def handle(self, *args, **options):
-        data = {
-            "Qatar": ["Doha", "Al Wakrah", "Al Khor", "Al Rayyan"],
-            "United Arab Emirates": ["Dubai", "Abu Dhabi", "Sharjah"],
-            "Saudi Arabia": ["Riyadh", "Jeddah", "Dammam"],
-            "Kuwait": ["Kuwait City", "Salmiya", "Hawalli"],
-            "Oman": ["Muscat", "Salalah", "Sohar"],
-            "Bahrain": ["Manama", "Muharraq"]
-        }
-
-        for country_name, cities in data.items():
-            country, created = Country.objects.get_or_create(name=country_name)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"✅ Added country: {country_name}"))
-            else:
-                self.stdout.write(self.style.WARNING(f"Country already exists: {country_name}"))
-
-            for city_name in cities:
-                city, city_created = City.objects.get_or_create(country=country, name=city_name)
-                if city_created:
-                    self.stdout.write(self.style.SUCCESS(f"   ↳ Added city: {city_name}"))
-                else:
-                    self.stdout.write(self.style.WARNING(f"   ↳ City already exists: {city_name}"))
-
-        self.stdout.write(self.style.SUCCESS("\n GCC countries and cities successfully loaded!"))
+        files = [options[name] for name in ("countries", "cities", "categories", "items", "prices")]
+        laundry = None
+        if options["prices"]:
+            if not options["laundry"]:
+                raise CommandError("--prices needs --laundry")
+            try:
+                laundry = Laundry.objects.get(pk=options["laundry"])
+            except Laundry.DoesNotExist:
+                raise CommandError(f"Laundry {options['laundry']} does not exist")
+
+        batch_size = options["batch_size"]
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                if not any(files):
+                    self.load("countries", load_countries(GCC_COUNTRIES, batch_size))
+                    cities = [{"country": code, "name": name} for code, names in GCC_CITIES.items() for name in names]
+                    self.load("cities", load_cities(cities, batch_size))
+                if options["countries"]:
+                    self.load("countries", load_countries(read_rows(options["countries"]), batch_size))
+                if options["cities"]:
+                    self.load("cities", load_cities(read_rows(options["cities"]), batch_size))
+                if options["categories"]:
+                    self.load("categories", len(load_categories(read_rows(options["categories"]), batch_size)))
+                if options["items"]:
+                    self.load("items", len(load_items(read_rows(options["items"]), batch_size)))
+                if laundry:
+                    self.load(f"prices for {laundry.name}", load_price_sheet(laundry, read_rows(options["prices"]), batch_size))
+        except (SeedDataError, OSError) as ex:
+            raise CommandError(str(ex))
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - start:.2f}s"))
+
+    def load(self, label, count):
+        self.stdout.write(f"Loaded {count} {label}")
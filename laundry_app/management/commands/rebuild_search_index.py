@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from laundry_app.search import rebuild_index
+
+#python manage.py rebuild_search_index
+class Command(BaseCommand):
+    help = "Rebuild the search index for all laundries, services and items"
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from laundry_app.ratings import recompute_ratings
+
+#python manage.py recompute_laundry_ratings
+class Command(BaseCommand):
+    help = "Recompute every laundry's review count, rating sum and average rating from its reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("laundry_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        count = recompute_ratings(options["laundry_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed ratings for {count} laundries"))
@@ -0,0 +1,85 @@
+import hashlib
+from collections import defaultdict
+
+from django.db.models import OuterRef, Subquery
+
+from hello_laundry_apis.caching import get_or_compute, make_key
+
+from .models import Category, ItemPrice
+from .serializers import CategorySerializer
+from .versioning import get_version
+
+
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Bumped on any Item/Category write, since those appear in every menu.
+CATALOGUE_VERSION_KEY = "menu:version:catalogue"
+
+
+def laundry_version_key(laundry_id):
+    return f"menu:version:laundry:{laundry_id}"
+
+
+def get_menu_version(laundry_id):
+    return get_version(CATALOGUE_VERSION_KEY, laundry_version_key(laundry_id))
+
+
+def get_menu_snapshot(laundry_id, build, *variant):
+    """
+    Return the cached result of `build()` for this laundry, rebuilding it
+    only when the laundry's menu version has moved on. `variant` tells
+    apart different views of the same menu (e.g. one category).
+    """
+    variant_hash = hashlib.md5(repr(variant).encode()).hexdigest()
+    key = make_key("menu", "snapshot", laundry_id, variant_hash, get_menu_version(laundry_id))
+    return get_or_compute(key, build, MENU_CACHE_TIMEOUT)
+
+
+def get_item_prices_by_category(laundry_id):
+    """
+    Load a laundry's whole price list in one joined query and
+    group it by category id.
+    """
+    item_prices = (
+        ItemPrice.objects.filter(laundry_id=laundry_id)
+        .select_related("item")
+        .order_by("id")
+    )
+
+    grouped = defaultdict(list)
+    for item_price in item_prices:
+        grouped[item_price.item.category_id].append(item_price)
+    return grouped
+
+
+def annotate_laundry_price(items, laundry_id):
+    """
+    Add `laundry_price`, the laundry's price for each item (None when it
+    has none), as a subquery column instead of prefetching every price.
+    """
+    price = ItemPrice.objects.filter(item=OuterRef("pk"), laundry_id=laundry_id).values("price")[:1]
+    return items.annotate(laundry_price=Subquery(price))
+
+
+def build_laundry_menu(laundry_id):
+    """
+    Categories with the laundry's priced items, in the shape
+    returned by CategorySerializer. Costs two queries regardless
+    of how many categories exist.
+    """
+    categories = Category.objects.all()
+    serializer = CategorySerializer(
+        categories,
+        many=True,
+        context={
+            "laundry_id": laundry_id,
+            "items_by_category": get_item_prices_by_category(laundry_id),
+        },
+    )
+    return serializer.data
+
+
+def get_cached_laundry_menu(laundry_id):
+    return get_menu_snapshot(
+        laundry_id, lambda: build_laundry_menu(laundry_id), "menu"
+    )
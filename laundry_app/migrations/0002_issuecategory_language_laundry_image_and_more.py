@@ -0,0 +1,121 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Language',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('is_rtl', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='laundry_images/'),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='offer_text',
+            field=models.CharField(blank=True, help_text='Eg: 20% OFF on first order', max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='starting_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Starting price from', max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='service_images/'),
+        ),
+        migrations.CreateModel(
+            name='CustomerAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('phone', models.CharField(blank=True, help_text='Alternate contact number for this address', max_length=20)),
+                ('country', models.CharField(max_length=20)),
+                ('city', models.CharField(max_length=100)),
+                ('zone', models.CharField(blank=True, max_length=10)),
+                ('area', models.CharField(blank=True, max_length=100)),
+                ('street', models.CharField(blank=True, max_length=100)),
+                ('building', models.CharField(blank=True, max_length=100)),
+                ('apartment', models.CharField(blank=True, max_length=50)),
+                ('pincode', models.CharField(blank=True, max_length=10)),
+                ('address_line', models.TextField(blank=True)),
+                ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('is_default', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addresses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-is_default', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LaundryReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('comment', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='laundry_reviews', to=settings.AUTH_USER_MODEL)),
+                ('laundry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='laundry_app.laundry')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportedIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('custom_issue', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reported_issues', to=settings.AUTH_USER_MODEL)),
+                ('issue_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='laundry_app.issuecategory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SupportContact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('support_phone', models.CharField(max_length=20)),
+                ('support_email', models.EmailField(max_length=254)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('country', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='support_contact', to='laundry_app.country')),
+            ],
+            options={
+                'ordering': ['country__name'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0002_issuecategory_language_laundry_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laundry',
+            index=models.Index(fields=['city', 'is_active', '-created_at'], name='laundry_city_act_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laundry',
+            index=models.Index(fields=['city', 'is_active', 'rating'], name='laundry_city_act_rating_idx'),
+        ),
+    ]
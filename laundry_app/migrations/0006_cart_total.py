@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('laundry_app', 'Cart')
+    CartItem = apps.get_model('laundry_app', 'CartItem')
+
+    money = DecimalField(max_digits=10, decimal_places=2)
+    line_total = (
+        CartItem.objects.filter(cart=OuterRef('pk'))
+        .values('cart')
+        .annotate(total=Sum(F('quantity') * F('item_price__price'), output_field=money))
+        .values('total')
+    )
+    Cart.objects.update(
+        total=Coalesce(Subquery(line_total), Value(Decimal('0')), output_field=money)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0005_order_cart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:17
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_review_totals(apps, schema_editor):
+    Laundry = apps.get_model('laundry_app', 'Laundry')
+    LaundryReview = apps.get_model('laundry_app', 'LaundryReview')
+
+    totals = (
+        LaundryReview.objects.order_by().values('laundry')
+        .annotate(count=Count('pk'), total=Sum('rating'))
+    )
+    laundries = []
+    for row in totals:
+        laundry = Laundry(pk=row['laundry'], review_count=row['count'], review_sum=row['total'])
+        laundry.rating = (row['total'] / row['count']).quantize(Decimal('0.1'))
+        laundries.append(laundry)
+    Laundry.objects.bulk_update(laundries, ['review_count', 'review_sum', 'rating'], batch_size=500)
+    # Ratings entered by hand on laundries nobody has reviewed
+    Laundry.objects.exclude(pk__in=LaundryReview.objects.values('laundry')).update(rating=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0007_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laundry',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='laundry',
+            name='review_sum',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_review_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0008_laundry_review_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laundryreview',
+            index=models.Index(fields=['laundry', '-created_at', '-id'], name='review_laundry_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0010_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='laundry',
+            name='rating',
+            field=models.DecimalField(decimal_places=1, default=0.0, editable=False, max_digits=3),
+        ),
+    ]
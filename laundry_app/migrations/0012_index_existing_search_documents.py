@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:02
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Same folding as laundry_app.search.normalize_text, frozen here so later
+# changes to search.py don't change what this migration does
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maksura -> ya
+    '\u0629': '\u0647',  # ta marbuta -> ha
+})
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ARABIC_DIACRITICS.sub('', text).translate(ARABIC_LETTER_VARIANTS)
+
+
+def index_existing_rows(apps, schema_editor):
+    SearchDocument = apps.get_model('laundry_app', 'SearchDocument')
+    Laundry = apps.get_model('laundry_app', 'Laundry')
+    Service = apps.get_model('laundry_app', 'Service')
+    Item = apps.get_model('laundry_app', 'Item')
+
+    sources = [
+        ('laundry', Laundry.objects.select_related('city'),
+         lambda obj: (obj.name, [obj.city.name, obj.address], obj.is_active)),
+        ('service', Service.objects.all(),
+         lambda obj: (obj.name, [obj.description], obj.is_active)),
+        ('item', Item.objects.select_related('category'),
+         lambda obj: (obj.name, [obj.category.name], True)),
+    ]
+    for object_type, queryset, describe in sources:
+        documents = []
+        for obj in queryset.iterator(chunk_size=2000):
+            name, related, is_active = describe(obj)
+            documents.append(SearchDocument(
+                object_type=object_type,
+                object_id=obj.pk,
+                name=name[:150],
+                title=normalize_text(name),
+                body=normalize_text(' '.join(filter(None, related))),
+                is_active=is_active,
+            ))
+        SearchDocument.objects.bulk_create(
+            documents,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['object_type', 'object_id'],
+            update_fields=['name', 'title', 'body', 'is_active'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laundry_app', '0011_laundry_rating_read_only'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import User
+from .geo import geo_cell
 
 ORDER_STATUS = (
     ("pending", "Pending"),
@@ -107,16 +108,35 @@ class Laundry(models.Model):
     )
     city = models.ForeignKey(City, related_name='laundries', on_delete=models.CASCADE)
     address = models.CharField(max_length=255, blank=True, null=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    # Grid cell of (latitude, longitude), see geo.py; kept in sync on save
+    geo_cell = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
     contact_number = models.CharField(max_length=20, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
     opening_hours = models.CharField(max_length=100, blank=True, null=True)
-    rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0)
+    # Average of the laundry's reviews; the running count and sum behind it
+    # are kept up to date on review create/delete, see ratings.py
+    rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    review_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
     is_active = models.BooleanField(default=True)
     services = models.ManyToManyField(Service, related_name="laundries")  # ← NEW
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["city", "is_active", "-created_at"], name="laundry_city_act_created_idx"),
+            models.Index(fields=["city", "is_active", "rating"], name="laundry_city_act_rating_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geo_cell"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} - {self.city.name}"
@@ -139,10 +159,12 @@ class Cart(models.Model):
     laundry = models.ForeignKey('Laundry', related_name='carts', on_delete=models.CASCADE)
     service = models.ForeignKey(Service, related_name='cart_items', on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True)
+    # Sum of the lines at current prices, kept up to date by carts.refresh_cart_totals
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def total_price(self):
-        return sum(item.subtotal() for item in self.items.all())
+        return self.total
 
     def __str__(self):
         return f"Cart of {self.user} for {self.laundry.name}"
@@ -165,6 +187,14 @@ class CartItem(models.Model):
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
     laundry = models.ForeignKey(Laundry, on_delete=models.CASCADE, related_name="orders")
+    # The cart this order was placed from; unique so a cart is only ordered once
+    cart = models.OneToOneField(
+        Cart,
+        on_delete=models.SET_NULL,
+        related_name="order",
+        null=True,
+        blank=True
+    )
     status = models.CharField(max_length=20, choices=ORDER_STATUS, default="pending")
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default="pending")
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -294,6 +324,38 @@ class LaundryReview(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["laundry", "-created_at", "-id"], name="review_laundry_created_idx"),
+        ]
 
     def __str__(self):
         return f"Review by {self.customer} for {self.laundry}"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, normalized text of a laundry, service or item, kept in
+    sync on save (see search.py). The full-text index over `title` and
+    `body` is database specific and created in the migration.
+    """
+    LAUNDRY = "laundry"
+    SERVICE = "service"
+    ITEM = "item"
+    TYPE_CHOICES = (
+        (LAUNDRY, "Laundry"),
+        (SERVICE, "Service"),
+        (ITEM, "Item"),
+    )
+
+    object_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=150)      # shown in results
+    title = models.TextField()                   # normalized name
+    body = models.TextField(blank=True)          # normalized related text
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        unique_together = ("object_type", "object_id")
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id}: {self.name}"
@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Cart, CartItem, Order, OrderItem
+
+
+class OrderPlacementError(Exception):
+    pass
+
+
+def place_order(user, cart_id=None):
+    """
+    Turn the user's active cart into an order in one transaction.
+
+    The cart is claimed with a conditional UPDATE on is_active before
+    anything else is written, so two concurrent checkouts of the same
+    cart can't both succeed; Order.cart is unique as a backstop. Lines
+    are read with their prices in one query and written with a single
+    bulk insert.
+    """
+    with transaction.atomic():
+        carts = Cart.objects.select_for_update().filter(user=user, is_active=True)
+        if cart_id is not None:
+            carts = carts.filter(pk=cart_id)
+        cart = carts.order_by("-created_at").only("id", "laundry_id").first()
+
+        if cart is None or not Cart.objects.filter(pk=cart.pk, is_active=True).update(is_active=False):
+            raise OrderPlacementError("No active cart found")
+
+        lines = list(
+            CartItem.objects.filter(cart=cart).values_list(
+                "item_price_id", "quantity", F("item_price__price")
+            )
+        )
+        if not lines:
+            raise OrderPlacementError("Cart is empty")
+
+        order = Order.objects.create(
+            user=user,
+            laundry_id=cart.laundry_id,
+            cart=cart,
+            status="pending",
+            payment_status="pending",
+            total_price=sum(price * quantity for _, quantity, price in lines),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, item_price_id=item_price_id, quantity=quantity, price=price)
+            for item_price_id, quantity, price in lines
+        ])
+
+    return order
@@ -1,20 +1,77 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from urllib.parse import urlparse, parse_qs
 
 
+def estimate_count(queryset):
+    """
+    Row estimate from the Postgres planner, which avoids a full COUNT(*).
+    Other databases have no cheap estimate, so they get the exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
 class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Passing `cursor` (empty for the
+    first page) switches to keyset pagination: `next`/`previous` become
+    opaque cursors, there's no OFFSET, and `count` is skipped unless
+    asked for with `count=exact` or `count=estimate`.
+    """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    cursor_mode = False
+
     def get_page_number_from_url(self, url):
         if not url:
             return None
         query_params = parse_qs(urlparse(url).query)
-        return int(query_params.get('page', [None])[0])
+        # DRF drops `page` from the link back to the first page
+        return int(query_params.get('page', [1])[0])
+
+    def use_cursor(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_queryset_by_cursor(queryset, request)
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response({
+                'count': self.count,
+                'next': self.next_cursor,
+                'previous': self.previous_cursor,
+                'results': data
+            })
+
         next_page = self.get_page_number_from_url(self.get_next_link())
         previous_page = self.get_page_number_from_url(self.get_previous_link())
 
@@ -24,3 +81,167 @@ class StandardResultsSetPagination(PageNumberPagination):
             'previous': previous_page,
             'results': data
         })
+
+    # Keyset pagination
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.ordering = self.get_keyset_ordering(queryset)
+        field_name, descending = self.ordering
+        pk_name = queryset.model._meta.pk.name
+        self.field = queryset.model._meta.get_field(field_name)
+
+        self.count = self.get_count(queryset, request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        if cursor:
+            queryset = queryset.filter(
+                self.keyset_filter(cursor['v'], cursor['pk'], descending, after=not reverse)
+            )
+
+        # Walking backwards flips the ordering; the page is reversed below.
+        order_desc = descending != reverse
+        pk_order = F(pk_name).desc() if order_desc else F(pk_name).asc()
+        if field_name == pk_name:
+            order_by = [pk_order]
+        else:
+            order_by = [self.order_term(order_desc, nulls_first=reverse), pk_order]
+
+        rows = list(queryset.order_by(*order_by)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            if has_next:
+                self.next_cursor = self.encode_cursor(rows[-1], reverse=False)
+            if has_previous:
+                self.previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        elif reverse:
+            # Walked back past the first row; let the client step forward again.
+            self.next_cursor = self.encode_position(cursor['v'], cursor['pk'], reverse=False)
+
+        return rows
+
+    def get_keyset_ordering(self, queryset):
+        """
+        The first ordering term applied by OrderingFilter (or the model
+        default), as `(field_name, descending)`. The primary key is
+        always added as a tiebreaker.
+        """
+        terms = queryset.query.order_by or queryset.model._meta.ordering
+        term = terms[0] if terms else '-pk'
+        if not isinstance(term, str) or '__' in term.lstrip('-'):
+            term = '-pk'
+
+        descending = term.startswith('-')
+        field_name = term.lstrip('-')
+        if field_name == 'pk':
+            field_name = queryset.model._meta.pk.name
+        return field_name, descending
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def order_term(self, descending, nulls_first):
+        expression = F(self.field.name)
+        if not self.field.null:
+            return expression.desc() if descending else expression.asc()
+
+        # NULLs sort last going forwards, whatever the backend's default.
+        nulls = {'nulls_first': True} if nulls_first else {'nulls_last': True}
+        return expression.desc(**nulls) if descending else expression.asc(**nulls)
+
+    def keyset_filter(self, value, pk, descending, after):
+        """
+        Rows strictly after (or before) the position `(value, pk)` in the
+        forward ordering.
+        """
+        name = self.field.name
+        forward, backward = ('lt', 'gt') if descending else ('gt', 'lt')
+        step = forward if after else backward
+
+        if self.field.primary_key:
+            return Q(**{f'pk__{step}': pk})
+
+        if value is None:
+            # Position is inside the trailing block of NULLs
+            same_block = Q(**{f'{name}__isnull': True, f'pk__{step}': pk})
+            return same_block if after else Q(**{f'{name}__isnull': False}) | same_block
+
+        q = Q(**{f'{name}__{step}': value}) | Q(**{name: value, f'pk__{step}': pk})
+        if after and self.field.null:
+            q |= Q(**{f'{name}__isnull': True})
+        return q
+
+    def encode_cursor(self, obj, reverse):
+        if isinstance(obj, dict):
+            # A values() row, see fast_serializers.ValuesListMixin
+            obj = SimpleNamespace(pk=obj['pk'], **{self.field.attname: obj[self.field.attname]})
+        value = getattr(obj, self.field.attname)
+        if value is not None:
+            value = self.field.value_to_string(obj)
+        return self.encode_position(value, obj.pk, reverse)
+
+    def encode_position(self, value, pk, reverse):
+        field_name, descending = self.ordering
+        payload = {
+            'o': ('-' if descending else '') + field_name,
+            'v': value,
+            'pk': pk,
+            'r': reverse,
+        }
+        return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()))
+            cursor = {
+                'o': payload['o'],
+                'v': payload['v'],
+                'pk': int(payload['pk']),
+                'r': bool(payload['r']),
+            }
+        except (TypeError, ValueError, KeyError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only meaningful for the ordering it was issued under.
+        field_name, descending = self.ordering
+        if cursor['o'] != ('-' if descending else '') + field_name:
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors come from the client; don't hand the ORM a value of the wrong type
+        if cursor['v'] is not None:
+            try:
+                cursor['v'] = self.field.to_python(cursor['v'])
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+
+class CursorResultsSetPagination(StandardResultsSetPagination):
+    """
+    Always keyset paginated, for lists that are only ever scrolled
+    (e.g. reviews); `page` is ignored.
+    """
+
+    def use_cursor(self, request):
+        return True
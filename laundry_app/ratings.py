@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Round
+from django.db.models.lookups import GreaterThan
+
+from .models import Laundry, LaundryReview
+
+
+def average_rating(count, total):
+    """
+    Expression for Laundry.rating from a review count and rating sum,
+    0 when there are no reviews.
+    """
+    rating = DecimalField(max_digits=3, decimal_places=1)
+    # Multiplying by 1.0 keeps SQLite from doing integer division
+    average = Round(total * Value(Decimal("1.0")) / count, 1, output_field=rating)
+    return Case(
+        When(GreaterThan(count, 0), then=average),
+        default=Value(Decimal("0")),
+        output_field=rating,
+    )
+
+
+def record_review(laundry_id, rating, delta=1):
+    """
+    Add (delta=1) or remove (delta=-1) one review's rating from the
+    laundry's running totals with a single UPDATE, so concurrent reviews
+    never lose each other's writes.
+    """
+    count = F("review_count") + delta
+    total = F("review_sum") + Decimal(rating) * delta
+    return Laundry.objects.filter(pk=laundry_id).update(
+        review_count=count,
+        review_sum=total,
+        rating=average_rating(count, total),
+    )
+
+
+def recompute_ratings(laundries=None):
+    """
+    Recompute review_count, review_sum and rating from LaundryReview for
+    the given laundries (a queryset or ids, default all) in bulk.
+    """
+    if laundries is None:
+        laundries = Laundry.objects.all()
+    elif not hasattr(laundries, "update"):
+        laundries = Laundry.objects.filter(pk__in=laundries)
+
+    reviews = LaundryReview.objects.filter(laundry=OuterRef("pk")).order_by().values("laundry")
+    money = DecimalField(max_digits=12, decimal_places=2)
+    with transaction.atomic():
+        updated = laundries.update(
+            review_count=Coalesce(
+                Subquery(reviews.annotate(n=Count("pk")).values("n")), 0,
+                output_field=IntegerField(),
+            ),
+            review_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("rating")).values("total")),
+                Value(Decimal("0")), output_field=money,
+            ),
+        )
+        laundries.update(rating=average_rating(F("review_count"), F("review_sum")))
+    return updated
@@ -0,0 +1,207 @@
+import re
+import unicodedata
+
+from django.db import connection
+
+from .models import Item, Laundry, SearchDocument, Service
+
+FTS_TABLE = "laundry_app_searchdocument_fts"
+
+# Weighted so a match in the name ranks above one in related text
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', body), 'B')"
+)
+
+# Tashkeel, Quranic marks, superscript alef and tatweel
+ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    "\u0622": "\u0627",  # alef with madda -> alef
+    "\u0623": "\u0627",  # alef with hamza above -> alef
+    "\u0625": "\u0627",  # alef with hamza below -> alef
+    "\u0671": "\u0627",  # alef wasla -> alef
+    "\u0649": "\u064a",  # alef maksura -> ya
+    "\u0629": "\u0647",  # ta marbuta -> ha
+})
+
+MAX_QUERY_TOKENS = 8
+
+
+def normalize_text(text):
+    """
+    Fold text so that English and Arabic spellings users type match what
+    was indexed: case, tashkeel, tatweel and common letter variants.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return ARABIC_DIACRITICS.sub("", text).translate(ARABIC_LETTER_VARIANTS)
+
+
+def tokenize(text):
+    return re.findall(r"\w+", normalize_text(text))[:MAX_QUERY_TOKENS]
+
+
+# Index maintenance
+
+def build_document(obj):
+    if isinstance(obj, Laundry):
+        return SearchDocument.LAUNDRY, obj.name, [obj.city.name, obj.address], obj.is_active
+    if isinstance(obj, Service):
+        return SearchDocument.SERVICE, obj.name, [obj.description], obj.is_active
+    if isinstance(obj, Item):
+        return SearchDocument.ITEM, obj.name, [obj.category.name], True
+    raise TypeError(f"{type(obj).__name__} is not searchable")
+
+
+def make_document(obj):
+    object_type, name, related, is_active = build_document(obj)
+    return SearchDocument(
+        object_type=object_type,
+        object_id=obj.pk,
+        name=name[:150],
+        title=normalize_text(name),
+        body=normalize_text(" ".join(filter(None, related))),
+        is_active=is_active,
+    )
+
+
+def index_object(obj):
+    document = make_document(obj)
+    SearchDocument.objects.update_or_create(
+        object_type=document.object_type,
+        object_id=document.object_id,
+        defaults={
+            "name": document.name,
+            "title": document.title,
+            "body": document.body,
+            "is_active": document.is_active,
+        },
+    )
+
+
+def index_objects(objects, batch_size=1000):
+    """
+    Index many objects with batched INSERT ... ON CONFLICT DO UPDATE, for
+    bulk writes that skip the post_save signal. Related names used in the
+    documents (city, category) should be select_related.
+    """
+    documents = [make_document(obj) for obj in objects]
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["object_type", "object_id"],
+        update_fields=["name", "title", "body", "is_active"],
+    )
+    return len(documents)
+
+
+def unindex_object(object_type, pk):
+    SearchDocument.objects.filter(object_type=object_type, object_id=pk).delete()
+
+
+def rebuild_index():
+    SearchDocument.objects.all().delete()
+    querysets = [
+        Laundry.objects.select_related("city"),
+        Service.objects.all(),
+        Item.objects.select_related("category"),
+    ]
+    return sum(index_objects(queryset.iterator(chunk_size=2000)) for queryset in querysets)
+
+
+# Querying
+
+class SearchBackend:
+    """
+    Ranked search over SearchDocument. Each backend turns the query
+    tokens into its own full-text syntax; all of them prefix-match every
+    token and require all tokens to match.
+    """
+
+    def search(self, tokens, object_type=None, limit=20):
+        raise NotImplementedError
+
+    def filters(self, object_type):
+        sql, params = ["d.is_active"], []
+        if object_type:
+            sql.append("d.object_type = %s")
+            params.append(object_type)
+        return " AND ".join(sql), params
+
+    def fetch(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                {"type": object_type, "id": object_id, "name": name, "score": round(score, 4)}
+                for object_type, object_id, name, score in cursor.fetchall()
+            ]
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    FTS5 external-content table kept in sync with SearchDocument by
+    triggers, ranked with bm25.
+    """
+
+    def search(self, tokens, object_type=None, limit=20):
+        match = " ".join(f'"{token}"*' for token in tokens)
+        where, params = self.filters(object_type)
+        return self.fetch(
+            f"SELECT d.object_type, d.object_id, d.name, -bm25({FTS_TABLE}, 10.0, 1.0) AS score "
+            f"FROM {FTS_TABLE} JOIN laundry_app_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND {where} "
+            f"ORDER BY score DESC LIMIT %s",
+            [match, *params, limit],
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    tsvector with the 'simple' configuration, which doesn't stem and so
+    treats Arabic and English words alike; served by a GIN expression
+    index and ranked with ts_rank.
+    """
+
+    def search(self, tokens, object_type=None, limit=20):
+        query = " & ".join(f"{token}:*" for token in tokens)
+        where, params = self.filters(object_type)
+        return self.fetch(
+            f"SELECT d.object_type, d.object_id, d.name, "
+            f"ts_rank({POSTGRES_VECTOR}, to_tsquery('simple', %s)) AS score "
+            f"FROM laundry_app_searchdocument d "
+            f"WHERE ({POSTGRES_VECTOR}) @@ to_tsquery('simple', %s) AND {where} "
+            f"ORDER BY score DESC LIMIT %s",
+            [query, query, *params, limit],
+        )
+
+
+class SimpleSearchBackend(SearchBackend):
+    """
+    Substring matching for databases without a supported full-text index.
+    """
+
+    def search(self, tokens, object_type=None, limit=20):
+        documents = SearchDocument.objects.filter(is_active=True)
+        if object_type:
+            documents = documents.filter(object_type=object_type)
+        for token in tokens:
+            documents = documents.filter(title__contains=token) | documents.filter(body__contains=token)
+        return [
+            {"type": d.object_type, "id": d.object_id, "name": d.name, "score": 0}
+            for d in documents.order_by("name")[:limit]
+        ]
+
+
+def get_search_backend():
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
+
+
+def search(text, object_type=None, limit=20):
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+    return get_search_backend().search(tokens, object_type=object_type, limit=limit)
@@ -0,0 +1,162 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from .carts import refresh_cart_totals
+from .menu import CATALOGUE_VERSION_KEY, laundry_version_key
+from .models import Cart, Category, City, Country, Item, ItemPrice
+from .search import index_objects
+from .versioning import CATEGORIES_VERSION_KEY, LOCATIONS_VERSION_KEY, bump_version
+
+BATCH_SIZE = 1000
+
+
+class SeedDataError(Exception):
+    pass
+
+
+def read_rows(path):
+    """
+    Rows of a .csv (with a header line) or .json (a list of objects)
+    file, as dicts.
+    """
+    path = Path(path)
+    with path.open(encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            return list(csv.DictReader(f))
+        if path.suffix.lower() == ".json":
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise SeedDataError(f"{path} must hold a list of objects")
+            return rows
+    raise SeedDataError(f"Unsupported file type: {path}")
+
+
+def clean(value):
+    return " ".join(str(value or "").split())
+
+
+def require(row, *fields):
+    values = [clean(row.get(field)) for field in fields]
+    missing = [field for field, value in zip(fields, values) if not value]
+    if missing:
+        raise SeedDataError(f"Missing {', '.join(missing)} in row {row}")
+    return values
+
+
+# Locations
+
+def load_countries(rows, batch_size=BATCH_SIZE):
+    """
+    Rows: name, country_code, currency_name, currency_code and optionally
+    currency_symbol. Countries that already exist are left as they are.
+    """
+    countries = []
+    for row in rows:
+        name, code, currency_name, currency_code = require(
+            row, "name", "country_code", "currency_name", "currency_code"
+        )
+        countries.append(Country(
+            name=name,
+            country_code=code.upper(),
+            currency_name=currency_name,
+            currency_code=currency_code.upper(),
+            currency_symbol=clean(row.get("currency_symbol")) or None,
+        ))
+    Country.objects.bulk_create(countries, batch_size=batch_size, ignore_conflicts=True)
+    bump_version(LOCATIONS_VERSION_KEY)
+    return len(countries)
+
+
+def load_cities(rows, batch_size=BATCH_SIZE):
+    """
+    Rows: country (name or country code) and name.
+    """
+    country_ids = {}
+    for pk, name, code in Country.objects.values_list("pk", "name", "country_code"):
+        country_ids[name.casefold()] = country_ids[code.casefold()] = pk
+
+    cities = []
+    for row in rows:
+        country, name = require(row, "country", "name")
+        if country.casefold() not in country_ids:
+            raise SeedDataError(f"Unknown country {country!r} for city {name!r}")
+        cities.append(City(country_id=country_ids[country.casefold()], name=name))
+    City.objects.bulk_create(cities, batch_size=batch_size, ignore_conflicts=True)
+    bump_version(LOCATIONS_VERSION_KEY)
+    return len(cities)
+
+
+# Catalogue
+
+def load_categories(rows, batch_size=BATCH_SIZE):
+    """
+    Rows: name. Returns {name: id} for every category named in the rows.
+    """
+    names = {require(row, "name")[0] for row in rows}
+    Category.objects.bulk_create(
+        [Category(name=name) for name in sorted(names)], batch_size=batch_size, ignore_conflicts=True
+    )
+    bump_version(CATEGORIES_VERSION_KEY)
+    bump_version(CATALOGUE_VERSION_KEY)
+    return dict(Category.objects.filter(name__in=names).values_list("name", "id"))
+
+
+def load_items(rows, batch_size=BATCH_SIZE):
+    """
+    Rows: category and name; missing categories are created. Returns
+    {(category name, item name): item id} for every item in the rows.
+    """
+    pairs = {tuple(require(row, "category", "name")) for row in rows}
+    category_ids = load_categories([{"name": category} for category, _ in pairs], batch_size)
+
+    existing = set(
+        Item.objects.filter(category_id__in=category_ids.values()).values_list("category__name", "name")
+    )
+    Item.objects.bulk_create(
+        [Item(category_id=category_ids[category], name=name) for category, name in sorted(pairs - existing)],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    items = Item.objects.filter(category_id__in=category_ids.values()).select_related("category")
+    item_ids, created = {}, []
+    for item in items:
+        key = (item.category.name, item.name)
+        if key in pairs:
+            item_ids[key] = item.pk
+            if key not in existing:
+                created.append(item)
+    index_objects(created, batch_size)
+    return item_ids
+
+
+def load_price_sheet(laundry, rows, batch_size=BATCH_SIZE):
+    """
+    Rows: category, item and price. Items missing from the catalogue are
+    created, then every price is written with batched
+    INSERT ... ON CONFLICT (laundry, item) DO UPDATE, so loading the same
+    sheet again only changes prices that moved.
+    """
+    prices = {}
+    for row in rows:
+        category, name, price = require(row, "category", "item", "price")
+        try:
+            prices[(category, name)] = Decimal(price)
+        except InvalidOperation:
+            raise SeedDataError(f"Invalid price {price!r} for {name!r}")
+
+    item_ids = load_items([{"category": c, "name": n} for c, n in prices], batch_size)
+    ItemPrice.objects.bulk_create(
+        [ItemPrice(laundry=laundry, item_id=item_ids[key], price=price) for key, price in prices.items()],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["laundry", "item"],
+        update_fields=["price"],
+    )
+
+    # bulk_create skips the ItemPrice signals
+    bump_version(laundry_version_key(laundry.pk))
+    refresh_cart_totals(Cart.objects.filter(laundry=laundry, is_active=True))
+    return len(prices)
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import (Service, Country, City, Cart, CartItem, ItemPrice, Item, Order, 
     OrderItem, Laundry, Category, CustomerAddress, Language, SupportContact, IssueCategory, ReportedIssue, LaundryReview)
@@ -89,7 +90,26 @@ class CountryWithCitiesSerializer(serializers.ModelSerializer):
             'cities',
         ]
 
-class LaundrySerializer(serializers.ModelSerializer):
+class EagerLoadingMixin:
+    """
+    Lets a serializer declare the relations it reads, so list views can
+    load them up front instead of once per row.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
+class LaundrySerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('city__country',)
+    prefetch_related_fields = (Prefetch('services', queryset=Service.objects.order_by('id')),)
+
     city_name = serializers.CharField(source='city.name', read_only=True)
     country_name = serializers.CharField(source='city.country.name', read_only=True)
 
@@ -105,6 +125,8 @@ class LaundrySerializer(serializers.ModelSerializer):
             'city_name',
             'country_name',
             'address',
+            'latitude',
+            'longitude',
             'contact_number',
             'email',
             'opening_hours',
@@ -117,6 +139,29 @@ class LaundrySerializer(serializers.ModelSerializer):
         ]
 
 
+class NearbyLaundrySerializer(LaundrySerializer):
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(LaundrySerializer.Meta):
+        fields = LaundrySerializer.Meta.fields + ['distance_km']
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 2)
+
+
+class NearbyLaundryQuerySerializer(serializers.Serializer):
+    address_id = serializers.IntegerField(required=False)
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(default=10, min_value=0.1, max_value=50)
+    limit = serializers.IntegerField(default=20, min_value=1, max_value=100)
+
+    def validate(self, attrs):
+        if attrs.get("address_id") is None and (attrs.get("lat") is None or attrs.get("lng") is None):
+            raise serializers.ValidationError("Either address_id or lat and lng are required.")
+        return attrs
+
+
 class LaundryCreateSerializer(serializers.ModelSerializer):
     service_ids = serializers.PrimaryKeyRelatedField(
         queryset=Service.objects.all(),
@@ -133,6 +178,8 @@ class LaundryCreateSerializer(serializers.ModelSerializer):
             'image',              
             'city',
             'address',
+            'latitude',
+            'longitude',
             'contact_number',
             'email',
             'opening_hours',
@@ -177,10 +224,15 @@ class CategorySerializer(serializers.ModelSerializer):
     def get_items(self, obj):
         laundry_id = self.context.get("laundry_id")
 
-        item_prices = ItemPrice.objects.filter(
-            laundry_id=laundry_id,
-            item__category=obj
-        ).select_related("item")
+        # Pre-grouped price list from menu.build_laundry_menu, if any
+        items_by_category = self.context.get("items_by_category")
+        if items_by_category is not None:
+            item_prices = items_by_category.get(obj.id, [])
+        else:
+            item_prices = ItemPrice.objects.filter(
+                laundry_id=laundry_id,
+                item__category=obj
+            ).select_related("item")
 
         return [
             {
@@ -195,18 +247,44 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class CartItemSerializer(serializers.ModelSerializer):
-    service_name = serializers.CharField(source="service.name", read_only=True)
-    price = serializers.DecimalField(source="service.starting_price", read_only=True,
+    item_name = serializers.CharField(source="item_price.item.name", read_only=True)
+    price = serializers.DecimalField(source="item_price.price", read_only=True,
                                      max_digits=8, decimal_places=2)
 
     class Meta:
         model = CartItem
-        fields = ["id", "service", "service_name", "price", "quantity", "cart"]
+        fields = ["id", "item_price", "item_name", "price", "quantity", "cart"]
         extra_kwargs = {
             "cart": {"write_only": True}
         }
 
-class CartSerializer(serializers.ModelSerializer):
+class CartLineSerializer(serializers.Serializer):
+    item_price = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class AddToCartSerializer(serializers.Serializer):
+    laundry = serializers.IntegerField()
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all())
+    item_price = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class BatchAddToCartSerializer(serializers.Serializer):
+    laundry = serializers.IntegerField()
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all())
+    items = CartLineSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_items(self, value):
+        # The same item twice in one request counts once with both quantities
+        lines = {}
+        for line in value:
+            lines[line["item_price"]] = lines.get(line["item_price"], 0) + line["quantity"]
+        return lines
+
+class CartSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    prefetch_related_fields = (
+        Prefetch("items", queryset=CartItem.objects.select_related("item_price__item")),
+    )
+
     items = CartItemSerializer(many=True, read_only=True)
     total_price = serializers.SerializerMethodField()
 
@@ -254,6 +332,10 @@ class ItemWithPriceSerializer(serializers.ModelSerializer):
         ]
 
     def get_price(self, obj):
+        # Annotated by ItemsByCategoryWithPriceView
+        if hasattr(obj, "laundry_price"):
+            return obj.laundry_price
+
         laundry_id = self.context.get("laundry_id")
         if not laundry_id:
             return None
@@ -306,8 +388,10 @@ class ReportIssueSerializer(serializers.ModelSerializer):
             )
         return data
 
-class LaundryReviewSerializer(serializers.ModelSerializer):
-    customer_name = serializers.CharField(source='customer.username', read_only=True)
+class LaundryReviewSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('customer',)
+
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
     
     class Meta:
         model = LaundryReview
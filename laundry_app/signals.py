@@ -0,0 +1,101 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .carts import refresh_cart_totals
+from .menu import CATALOGUE_VERSION_KEY, laundry_version_key
+from .models import (
+    Cart, CartItem, Category, City, Country, IssueCategory, Item, ItemPrice, Language, Laundry,
+    LaundryReview, SearchDocument, Service,
+)
+from .ratings import record_review
+from .search import index_object, unindex_object
+from .versioning import (
+    CATEGORIES_VERSION_KEY, ISSUES_VERSION_KEY, LANGUAGES_VERSION_KEY,
+    LOCATIONS_VERSION_KEY, SERVICES_VERSION_KEY, bump_version,
+)
+
+CATALOGUE_VERSION_KEYS = {
+    Country: LOCATIONS_VERSION_KEY,
+    City: LOCATIONS_VERSION_KEY,
+    Service: SERVICES_VERSION_KEY,
+    Category: CATEGORIES_VERSION_KEY,
+    Language: LANGUAGES_VERSION_KEY,
+    IssueCategory: ISSUES_VERSION_KEY,
+}
+
+
+@receiver([post_save, post_delete], sender=ItemPrice)
+def invalidate_laundry_menu(sender, instance, **kwargs):
+    bump_version(laundry_version_key(instance.laundry_id))
+
+
+@receiver(post_save, sender=ItemPrice)
+def refresh_totals_of_carts_with_price(sender, instance, created, **kwargs):
+    if not created:
+        refresh_cart_totals(Cart.objects.filter(is_active=True, items__item_price=instance))
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def refresh_cart_total(sender, instance, **kwargs):
+    refresh_cart_totals([instance.cart_id])
+
+
+@receiver(post_save, sender=LaundryReview)
+def add_review_to_rating(sender, instance, created, **kwargs):
+    if created:
+        record_review(instance.laundry_id, instance.rating)
+
+
+@receiver(post_delete, sender=LaundryReview)
+def remove_review_from_rating(sender, instance, **kwargs):
+    record_review(instance.laundry_id, instance.rating, delta=-1)
+
+
+@receiver([post_save, post_delete], sender=Item)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_all_menus(sender, instance, **kwargs):
+    bump_version(CATALOGUE_VERSION_KEY)
+
+
+def invalidate_catalogue(sender, instance, **kwargs):
+    bump_version(CATALOGUE_VERSION_KEYS[sender])
+
+
+for model in CATALOGUE_VERSION_KEYS:
+    post_save.connect(invalidate_catalogue, sender=model)
+    post_delete.connect(invalidate_catalogue, sender=model)
+
+
+SEARCH_TYPES = {
+    Laundry: SearchDocument.LAUNDRY,
+    Service: SearchDocument.SERVICE,
+    Item: SearchDocument.ITEM,
+}
+
+
+def update_search_document(sender, instance, **kwargs):
+    index_object(instance)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    unindex_object(SEARCH_TYPES[sender], instance.pk)
+
+
+for model in SEARCH_TYPES:
+    post_save.connect(update_search_document, sender=model)
+    post_delete.connect(remove_search_document, sender=model)
+
+
+# Category and city names are part of their items' and laundries' documents
+@receiver(post_save, sender=Category)
+def reindex_category_items(sender, instance, created, **kwargs):
+    if not created:
+        for item in instance.items.all():
+            index_object(item)
+
+
+@receiver(post_save, sender=City)
+def reindex_city_laundries(sender, instance, created, **kwargs):
+    if not created:
+        for laundry in instance.laundries.all():
+            index_object(laundry)
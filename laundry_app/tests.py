@@ -1,3 +1,1312 @@
-from django.test import TestCase
+import json
+import time
+from base64 import urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.authentication import local_token_cache
+from accounts.models import User
+from hello_laundry_apis.caching import cache_is_shared, get_or_compute, make_key
+from hello_laundry_apis.metrics import install_query_recording, registry
+from . import async_views
+from .checks import check_shared_cache
+from .fast_serializers import CountryValuesSerializer, LaundryValuesSerializer
+from .geo import geo_cell, geo_cell_ranges, haversine_km
+from .locations import clear_local_tree
+from .menu import get_cached_laundry_menu
+from .models import (
+    Cart, CartItem, Category, City, Country, CustomerAddress, IssueCategory, Item, ItemPrice, Language,
+    Laundry, LaundryReview, Order, SearchDocument, Service, SupportContact,
+)
+from .orders import OrderPlacementError, place_order
+from .search import normalize_text, search
+from .serializers import CartSerializer, LaundrySerializer
+from .versioning import LANGUAGES_VERSION_KEY, get_version
+from .views import LaundryListByCityView
+
+
+class LaundryTestDataMixin:
+    """
+    Minimal country/city/laundry fixture shared by the API tests.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(mobile="50000001")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.country = Country.objects.create(
+            name="Qatar",
+            country_code="QA",
+            currency_name="Qatari Riyal",
+            currency_code="QAR",
+        )
+        self.city = City.objects.create(country=self.country, name="Doha")
+        self.laundry = Laundry.objects.create(name="Fresh Laundry", city=self.city)
+
+    def create_cart(self, lines, user=None):
+        if not ItemPrice.objects.filter(laundry=self.laundry).exists():
+            self.create_menu(categories=1, items_per_category=lines)
+        service = Service.objects.get_or_create(name="Wash", defaults={"starting_price": 10})[0]
+        cart = Cart.objects.create(user=user or self.user, laundry=self.laundry, service=service)
+        for quantity, item_price in enumerate(ItemPrice.objects.filter(laundry=self.laundry)[:lines], start=1):
+            CartItem.objects.create(cart=cart, item_price=item_price, quantity=quantity)
+        return cart
+
+    def create_menu(self, categories, items_per_category, laundry=None):
+        laundry = laundry or self.laundry
+        for c in range(categories):
+            category = Category.objects.create(name=f"Category {c}")
+            for i in range(items_per_category):
+                item = Item.objects.create(category=category, name=f"Item {c}-{i}")
+                ItemPrice.objects.create(
+                    laundry=laundry, item=item, price=Decimal("5.00") + i
+                )
+
+
+class LaundryItemListViewTests(LaundryTestDataMixin, TestCase):
+
+    def url(self, laundry_id=None):
+        return reverse("laundry-items", args=[laundry_id or self.laundry.id])
+
+    def test_menu_shape(self):
+        self.create_menu(categories=1, items_per_category=2)
+        Category.objects.create(name="Empty")
+
+        response = self.client.get(self.url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [c["name"] for c in response.data], ["Category 0", "Empty"]
+        )
+        menu = response.data[0]
+        self.assertEqual(set(menu), {"id", "name", "icon", "items"})
+        self.assertEqual(menu["icon"], None)
+        self.assertEqual(
+            menu["items"],
+            [
+                {"id": item.id, "name": item.name, "image": None, "price": item.prices.get().price}
+                for item in Item.objects.order_by("id")
+            ],
+        )
+        self.assertEqual(response.data[1]["items"], [])
+
+    def test_menu_only_includes_this_laundrys_prices(self):
+        other = Laundry.objects.create(name="Other", city=self.city)
+        self.create_menu(categories=1, items_per_category=1, laundry=other)
+
+        response = self.client.get(self.url())
+
+        self.assertEqual(response.data[0]["items"], [])
+
+    def test_query_count_is_constant(self):
+        self.create_menu(categories=2, items_per_category=2)
+        with self.assertNumQueries(2):
+            self.client.get(self.url())
+
+        for c in range(2, 20):
+            category = Category.objects.create(name=f"Category {c}")
+            item = Item.objects.create(category=category, name=f"Item {c}")
+            ItemPrice.objects.create(laundry=self.laundry, item=item, price=1)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url())
+        self.assertEqual(len(response.data), 20)
+
+
+class MenuSnapshotCacheTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_menu(categories=2, items_per_category=2)
+        self.item_price = ItemPrice.objects.order_by("id").first()
+
+    def menu_url(self):
+        return reverse("laundry-items", args=[self.laundry.id])
+
+    def items_url(self):
+        category = self.item_price.item.category
+        return reverse("items-by-category-with-price") + (
+            f"?laundry_id={self.laundry.id}&category_id={category.id}"
+        )
+
+    def test_warm_menu_is_served_without_queries(self):
+        first = self.client.get(self.menu_url())
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.menu_url())
+        self.assertEqual(first.data, second.data)
+
+        items_url = self.items_url()
+        self.client.get(items_url)
+        with self.assertNumQueries(0):
+            self.client.get(items_url)
+
+    def test_item_price_write_invalidates_menu(self):
+        self.client.get(self.menu_url())
+        self.client.get(self.items_url())
+
+        self.item_price.price = Decimal("99.00")
+        self.item_price.save()
+
+        menu = self.client.get(self.menu_url()).data
+        self.assertEqual(menu[0]["items"][0]["price"], Decimal("99.00"))
+        items = self.client.get(self.items_url()).data["results"]
+        self.assertIn(Decimal("99.00"), [item["price"] for item in items])
+
+        self.item_price.delete()
+        menu = self.client.get(self.menu_url()).data
+        self.assertEqual(len(menu[0]["items"]), 1)
+
+    def test_other_laundrys_price_write_keeps_snapshot(self):
+        self.client.get(self.menu_url())
+        other = Laundry.objects.create(name="Other", city=self.city)
+        ItemPrice.objects.create(laundry=other, item=self.item_price.item, price=1)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.menu_url())
+
+    def test_item_and_category_writes_invalidate_menu(self):
+        self.client.get(self.menu_url())
+
+        item = self.item_price.item
+        item.name = "Renamed"
+        item.save()
+        menu = self.client.get(self.menu_url()).data
+        self.assertEqual(menu[0]["items"][0]["name"], "Renamed")
+
+        category = item.category
+        category.name = "A First"
+        category.save()
+        menu = self.client.get(self.menu_url()).data
+        self.assertEqual(menu[0]["name"], "A First")
+
+
+class CatalogueConditionalGetTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Language.objects.create(name="English", code="en")
+
+    def test_unchanged_catalogue_returns_304_without_queries(self):
+        for name in ["language-list", "service-list", "locations", "category-list", "issue-list"]:
+            url = reverse(name)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response["ETag"]
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_write_changes_etag(self):
+        url = reverse("language-list")
+        etag = self.client.get(url)["ETag"]
+
+        Language.objects.create(name="Arabic", code="ar", is_rtl=True)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_city_write_changes_locations_etag(self):
+        url = reverse("locations")
+        etag = self.client.get(url)["ETag"]
+
+        City.objects.create(country=self.country, name="Al Khor")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["laundry_app.E001"])
+        db_cache = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "t"}}
+        with self.settings(CACHES=db_cache):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_query_string_is_part_of_etag(self):
+        url = reverse("locations")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, {"country": "qatar"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["name"], "Qatar")
+
+
+class LaundryListByCityViewTests(LaundryTestDataMixin, TestCase):
+
+    def create_laundries(self, count):
+        services = [
+            Service.objects.create(name=f"Service {i}", starting_price=10)
+            for i in range(3)
+        ]
+        for i in range(count):
+            laundry = Laundry.objects.create(name=f"Laundry {i}", city=self.city)
+            laundry.services.set(services)
+
+    def test_response_fields(self):
+        self.create_laundries(1)
+
+        response = self.client.get(reverse("laundry-list-by-city"), {"city__name__icontains": "doh"})
+
+        self.assertEqual(response.data["count"], 2)
+        row = response.data["results"][0]
+        self.assertEqual(row["city_name"], "Doha")
+        self.assertEqual(row["country_name"], "Qatar")
+        self.assertEqual(row["services"], ["Service 0", "Service 1", "Service 2"])
+
+    def test_query_count_is_constant_per_page(self):
+        self.create_laundries(120)
+
+        for page_size in (10, 100):
+            # count, laundries joined with city and country, services prefetch
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    reverse("laundry-list-by-city"), {"page_size": page_size}
+                )
+            self.assertEqual(len(response.data["results"]), page_size)
+
+
+class CursorPaginationTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.laundry.delete()
+        # Ties and NULLs on starting_price exercise the pk tiebreaker.
+        for i, price in enumerate([5, None, 5, 7, None, 3, 5, 9, 7, None, 1]):
+            Laundry.objects.create(name=f"Laundry {i:02}", city=self.city, starting_price=price, rating=i % 3)
+
+    def walk(self, ordering, page_size=3):
+        url = reverse("laundry-list-by-city")
+        params = {"cursor": "", "ordering": ordering, "page_size": page_size}
+        seen, pages = [], []
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            seen += [row["id"] for row in response.data["results"]]
+            if not response.data["next"]:
+                return seen, pages
+            params["cursor"] = response.data["next"]
+
+    def test_forward_walk_matches_offset_ordering(self):
+        for ordering in ["starting_price", "-starting_price", "rating", "-rating", "name", "-created_at"]:
+            seen, pages = self.walk(ordering)
+            self.assertEqual(len(seen), 11, ordering)
+            self.assertEqual(len(set(seen)), 11, ordering)
+            self.assertIsNone(pages[0]["previous"])
+            self.assertIsNone(pages[0]["count"])
+
+        seen, _ = self.walk("starting_price")
+        prices = [Laundry.objects.get(id=pk).starting_price for pk in seen]
+        non_null = [p for p in prices if p is not None]
+        self.assertEqual(non_null, sorted(non_null))
+        self.assertEqual(prices[len(non_null):], [None, None, None])
+
+    def test_previous_walks_back_to_same_pages(self):
+        _, pages = self.walk("-starting_price")
+        url = reverse("laundry-list-by-city")
+        params = {"ordering": "-starting_price", "page_size": 3}
+
+        for expected in reversed(pages[:-1]):
+            params["cursor"] = pages[-1]["previous"]
+            response = self.client.get(url, params)
+            self.assertEqual(response.data["results"], expected["results"])
+            pages.pop()
+
+    def test_count_modes(self):
+        url = reverse("laundry-list-by-city")
+        response = self.client.get(url, {"cursor": "", "count": "exact"})
+        self.assertEqual(response.data["count"], 11)
+        response = self.client.get(url, {"cursor": "", "count": "estimate"})
+        self.assertEqual(response.data["count"], 11)
+
+        with self.assertNumQueries(2):
+            self.client.get(url, {"cursor": ""})
+
+    def test_invalid_cursor(self):
+        url = reverse("laundry-list-by-city")
+        response = self.client.get(url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+        cursor = self.client.get(url, {"cursor": "", "ordering": "name"}).data["next"]
+        response = self.client.get(url, {"cursor": cursor, "ordering": "rating"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_value(self):
+        url = reverse("laundry-list-by-city")
+        for ordering, value in [("-rating", "abc"), ("-created_at", "garbage"), ("-rating", {"a": 1}),
+                                ("starting_price", [1])]:
+            cursor = urlsafe_b64encode(json.dumps({"o": ordering, "v": value, "pk": 1, "r": False}).encode())
+            response = self.client.get(url, {"cursor": cursor.decode(), "ordering": ordering})
+            self.assertEqual(response.status_code, 404, (ordering, value))
+
+    def test_page_mode_is_unchanged(self):
+        response = self.client.get(reverse("laundry-list-by-city"), {"page": 2})
+        self.assertEqual(response.data["count"], 11)
+        self.assertEqual(response.data["next"], None)
+        self.assertEqual(response.data["previous"], 1)
+
+
+class LaundryCityFilterTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_city = City.objects.create(country=self.country, name="Al Wakrah")
+        self.other = Laundry.objects.create(name="Wakrah Wash", city=self.other_city)
+
+    def get_ids(self, params):
+        response = self.client.get(reverse("laundry-list-by-city"), params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_filter_by_city_id(self):
+        self.assertEqual(self.get_ids({"city_id": self.other_city.id}), [self.other.id])
+
+    def test_filter_by_normalized_city_name(self):
+        self.assertEqual(self.get_ids({"city_name": "  al   WAKRAH "}), [self.other.id])
+        self.assertEqual(self.get_ids({"city_name": "wakrah"}), [])
+
+    def test_legacy_icontains_filter(self):
+        self.assertEqual(self.get_ids({"city__name__icontains": "doh"}), [self.laundry.id])
+        self.assertEqual(self.get_ids({"city__name__icontains": "a"}), [self.other.id, self.laundry.id])
+
+    def test_city_ids_are_resolved_once(self):
+        params = {"city__name__icontains": "doh"}
+        # city lookup, count, laundries, services
+        with self.assertNumQueries(4):
+            self.get_ids(params)
+        with self.assertNumQueries(3):
+            self.get_ids(params)
+
+        City.objects.create(country=self.country, name="Doha West")
+        with self.assertNumQueries(4):
+            self.get_ids(params)
+
+
+class NearbyLaundryTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # West Bay, Doha
+        self.origin = (Decimal("25.320000"), Decimal("51.530000"))
+        self.laundry.latitude, self.laundry.longitude = Decimal("25.330000"), Decimal("51.530000")
+        self.laundry.save()
+        self.far = Laundry.objects.create(
+            name="Wakrah", city=self.city, latitude=Decimal("25.170000"), longitude=Decimal("51.600000")
+        )
+        self.near = Laundry.objects.create(
+            name="Next door", city=self.city, latitude=Decimal("25.320500"), longitude=Decimal("51.530000")
+        )
+        Laundry.objects.create(name="Nowhere", city=self.city)
+
+    def get(self, **params):
+        return self.client.get(reverse("laundry-nearby"), params)
+
+    def test_geo_cell_kept_in_sync(self):
+        self.assertEqual(self.far.geo_cell, geo_cell(25.17, 51.6))
+        self.far.latitude = Decimal("26.000000")
+        self.far.save(update_fields=["latitude"])
+        self.far.refresh_from_db()
+        self.assertEqual(self.far.geo_cell, geo_cell(26, 51.6))
+
+    def test_nearest_first_within_radius(self):
+        response = self.get(lat=self.origin[0], lng=self.origin[1], radius_km=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data], [self.near.id, self.laundry.id])
+        self.assertEqual(response.data[1]["distance_km"], 1.11)
+
+        response = self.get(lat=self.origin[0], lng=self.origin[1], radius_km=50, limit=2)
+        self.assertEqual([row["id"] for row in response.data], [self.near.id, self.laundry.id])
+
+        response = self.get(lat=self.origin[0], lng=self.origin[1], radius_km=50)
+        self.assertEqual(response.data[-1]["id"], self.far.id)
+
+    def test_search_from_saved_address(self):
+        address = CustomerAddress.objects.create(
+            user=self.user, name="Home", country="Qatar", city="Doha", zone="66",
+            latitude=self.origin[0], longitude=self.origin[1],
+        )
+        response = self.get(address_id=address.id, radius_km=1)
+        self.assertEqual([row["id"] for row in response.data], [self.near.id])
+
+        other = User.objects.create_user(mobile="50000002")
+        address.user = other
+        address.save()
+        self.assertEqual(self.get(address_id=address.id).status_code, 404)
+
+    def test_requires_a_location(self):
+        self.assertEqual(self.get().status_code, 400)
+        self.assertEqual(self.get(lat=25).status_code, 400)
+        self.assertEqual(self.get(lat=25, lng=51, radius_km=500).status_code, 400)
+
+    def test_cell_ranges_cover_radius(self):
+        for lat, lng in [(25.3, 51.5), (-33.9, 151.2), (64.1, -21.9), (0, 179.99)]:
+            ranges = geo_cell_ranges(lat, lng, 25)
+            for d_lat, d_lng in [(0.22, 0), (-0.22, 0), (0, 0.24), (0, -0.24), (0.15, 0.15)]:
+                point = (lat + d_lat, (lng + d_lng + 180) % 360 - 180)
+                if haversine_km(lat, lng, *point) <= 25:
+                    cell = geo_cell(*point)
+                    self.assertTrue(any(first <= cell <= last for first, last in ranges), (lat, lng, point))
+
+
+class PlaceOrderTests(LaundryTestDataMixin, TestCase):
+
+    def test_order_copies_cart_lines_and_total(self):
+        cart = self.create_cart(lines=3)
+
+        response = self.client.post(reverse("place-order"))
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data["order_id"])
+        # prices 5, 6, 7 with quantities 1, 2, 3
+        self.assertEqual(order.total_price, Decimal("38.00"))
+        self.assertEqual(order.cart, cart)
+        self.assertEqual(
+            sorted(order.items.values_list("quantity", "price")),
+            [(1, Decimal("5.00")), (2, Decimal("6.00")), (3, Decimal("7.00"))],
+        )
+        cart.refresh_from_db()
+        self.assertFalse(cart.is_active)
+
+    def test_query_count_is_constant(self):
+        self.create_menu(categories=1, items_per_category=12)
+        for lines in (2, 12):
+            self.create_cart(lines=lines)
+            # savepoint, cart lookup, cart claim, lines, order, order items, release
+            with self.assertNumQueries(7):
+                response = self.client.post(reverse("place-order"))
+            self.assertEqual(response.status_code, 201)
+
+    def test_cart_cannot_be_ordered_twice(self):
+        cart = self.create_cart(lines=1)
+        place_order(self.user, cart_id=cart.id)
+
+        with self.assertRaises(OrderPlacementError):
+            place_order(self.user, cart_id=cart.id)
+        response = self.client.post(reverse("place-order"), {"cart": cart.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_empty_cart_is_left_active(self):
+        cart = self.create_cart(lines=0)
+
+        response = self.client.post(reverse("place-order"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "Cart is empty")
+        cart.refresh_from_db()
+        self.assertTrue(cart.is_active)
+        self.assertFalse(Order.objects.exists())
+
+
+class CartTotalTests(LaundryTestDataMixin, TestCase):
+
+    def test_total_follows_line_writes(self):
+        cart = self.create_cart(lines=2)
+        cart.refresh_from_db()
+        # 5 x 1 + 6 x 2
+        self.assertEqual(cart.total_price(), Decimal("17.00"))
+
+        line = cart.items.order_by("id").first()
+        line.quantity = 3
+        line.save()
+        cart.refresh_from_db()
+        self.assertEqual(cart.total, Decimal("27.00"))
+
+        line.delete()
+        cart.refresh_from_db()
+        self.assertEqual(cart.total, Decimal("12.00"))
+
+        cart.items.all().delete()
+        cart.refresh_from_db()
+        self.assertEqual(cart.total, Decimal("0.00"))
+
+    def test_total_follows_price_changes_in_active_carts(self):
+        cart = self.create_cart(lines=1)
+        ordered = self.create_cart(lines=1)
+        place_order(self.user, cart_id=ordered.id)
+
+        item_price = ItemPrice.objects.get()
+        item_price.price = Decimal("8.00")
+        item_price.save()
+
+        cart.refresh_from_db()
+        ordered.refresh_from_db()
+        self.assertEqual(cart.total, Decimal("8.00"))
+        self.assertEqual(ordered.total, Decimal("5.00"))
+
+    def test_serializing_a_cart_takes_two_queries(self):
+        self.create_menu(categories=1, items_per_category=15)
+        for lines in (2, 15):
+            cart = self.create_cart(lines=lines)
+            with self.assertNumQueries(2):
+                cart = CartSerializer.setup_eager_loading(Cart.objects.filter(pk=cart.pk)).get()
+                data = CartSerializer(cart).data
+            self.assertEqual(len(data["items"]), lines)
+            self.assertEqual(data["total_price"], sum(
+                Decimal(item["price"]) * item["quantity"] for item in data["items"]
+            ))
+            self.assertEqual(set(data["items"][0]), {"id", "item_price", "item_name", "price", "quantity"})
+
+
+class AddToCartTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_menu(categories=1, items_per_category=15)
+        self.service = Service.objects.create(name="Wash", starting_price=10)
+        self.prices = list(ItemPrice.objects.order_by("id"))
+
+    def post_batch(self, lines):
+        return self.client.post(reverse("add-to-cart-batch"), {
+            "laundry": self.laundry.id,
+            "service": self.service.id,
+            "items": [{"item_price": ip.id, "quantity": q} for ip, q in lines],
+        }, format="json")
+
+    def test_batch_creates_cart_and_lines(self):
+        response = self.post_batch([(ip, 2) for ip in self.prices])
+
+        self.assertEqual(response.status_code, 200)
+        cart = response.data["cart"]
+        self.assertEqual(len(cart["items"]), 15)
+        self.assertEqual(cart["total_price"], sum(ip.price * 2 for ip in self.prices))
+
+    def test_batch_adds_to_existing_quantities(self):
+        self.post_batch([(self.prices[0], 1)])
+        response = self.post_batch([(self.prices[0], 2), (self.prices[1], 1), (self.prices[1], 1)])
+
+        quantities = {item["item_price"]: item["quantity"] for item in response.data["cart"]["items"]}
+        self.assertEqual(quantities, {self.prices[0].id: 3, self.prices[1].id: 2})
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertEqual(Cart.objects.get().total, Decimal("27.00"))
+
+    def test_query_count_does_not_grow_with_lines(self):
+        self.post_batch([(self.prices[0], 1)])
+        for lines in (self.prices[:2], self.prices):
+            # user's service, savepoint, prices, cart, lines in cart, upsert,
+            # total, release, then the cart and its lines for the response
+            with self.assertNumQueries(10):
+                self.post_batch([(ip, 1) for ip in lines])
+
+    def test_rejects_prices_of_other_laundries(self):
+        other = Laundry.objects.create(name="Other", city=self.city)
+        foreign = ItemPrice.objects.create(laundry=other, item=self.prices[0].item, price=1)
+
+        response = self.post_batch([(self.prices[0], 1), (foreign, 1)])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_single_add(self):
+        response = self.client.post(reverse("add-to-cart"), {
+            "laundry": self.laundry.id,
+            "service": self.service.id,
+            "item_price": self.prices[0].id,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Item added to cart")
+        self.assertEqual(response.data["cart"]["items"][0]["quantity"], 1)
+
+
+class SearchTests(LaundryTestDataMixin, TestCase):
+
+    def get(self, **params):
+        return self.client.get(reverse("search"), params)
+
+    def results(self, text, **kwargs):
+        return [(r["type"], r["name"]) for r in search(text, **kwargs)]
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertTrue(SearchDocument.objects.filter(object_type="laundry", object_id=self.laundry.id).exists())
+
+        self.laundry.name = "Sparkle Wash"
+        self.laundry.save()
+        self.assertEqual(self.results("sparkle"), [("laundry", "Sparkle Wash")])
+        self.assertEqual(self.results("fresh"), [])
+
+        self.laundry.delete()
+        self.assertEqual(self.results("sparkle"), [])
+
+    def test_prefix_match_across_models(self):
+        Service.objects.create(name="Dry Clean", starting_price=20, description="Gentle cleaning for suits")
+        category = Category.objects.create(name="Formal")
+        Item.objects.create(category=category, name="Suit")
+
+        self.assertEqual(
+            sorted(self.results("sui")), [("item", "Suit"), ("service", "Dry Clean")]
+        )
+        self.assertEqual(self.results("sui", object_type="item"), [("item", "Suit")])
+
+    def test_name_match_ranks_above_description_match(self):
+        Service.objects.create(name="Ironing", starting_price=5, description="Pressed shirts")
+        Service.objects.create(name="Shirt Care", starting_price=8, description="Washed and folded")
+
+        self.assertEqual(
+            self.results("shirt"), [("service", "Shirt Care"), ("service", "Ironing")]
+        )
+
+    def test_arabic_ignores_diacritics_and_letter_variants(self):
+        Laundry.objects.create(name="مَغْسَلَة الأمل", city=self.city)
+
+        self.assertEqual(normalize_text("مَغْسَلَة الدوحـــة أحمد"), "مغسله الدوحه احمد")
+        self.assertEqual(self.results("مغسلة الامل"), [("laundry", "مَغْسَلَة الأمل")])
+
+    def test_inactive_objects_are_hidden(self):
+        Laundry.objects.create(name="Closed Laundry", city=self.city, is_active=False)
+
+        self.assertEqual(self.results("laundry"), [("laundry", "Fresh Laundry")])
+
+    def test_category_rename_reindexes_items(self):
+        category = Category.objects.create(name="Bedding")
+        Item.objects.create(category=category, name="Duvet")
+        category.name = "Linen"
+        category.save()
+
+        self.assertEqual(self.results("linen"), [("item", "Duvet")])
+
+    def test_endpoint(self):
+        response = self.get(q="fresh", limit=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r["type"], r["id"], r["name"]) for r in response.data["results"]],
+            [("laundry", self.laundry.id, "Fresh Laundry")],
+        )
+        self.assertEqual(self.get(q="").status_code, 400)
+        self.assertEqual(self.get(q="fresh", type="order").status_code, 400)
+
+
+class LaundryRatingTests(LaundryTestDataMixin, TestCase):
+
+    def review(self, rating, laundry=None):
+        return LaundryReview.objects.create(
+            customer=self.user, laundry=laundry or self.laundry, rating=Decimal(rating)
+        )
+
+    def assertRating(self, count, total, rating):
+        self.laundry.refresh_from_db()
+        self.assertEqual(
+            (self.laundry.review_count, self.laundry.review_sum, self.laundry.rating),
+            (count, Decimal(total), Decimal(rating)),
+        )
+
+    def test_reviews_update_running_totals(self):
+        self.review("4.5")
+        self.assertRating(1, "4.5", "4.5")
+
+        second = self.review("3")
+        self.review("5")
+        self.assertRating(3, "12.5", "4.2")
+
+        second.delete()
+        self.assertRating(2, "9.5", "4.8")
+
+    def test_removing_last_review_resets_rating(self):
+        self.review("4").delete()
+
+        self.assertRating(0, "0", "0")
+
+    def test_review_endpoint_updates_rating(self):
+        response = self.client.post(
+            reverse("laundry-reviews-add", args=[self.laundry.id]), {"rating": "4.00", "comment": "Good"}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertRating(1, "4", "4")
+
+    def test_recompute_repairs_drift(self):
+        other = Laundry.objects.create(name="Other", city=self.city)
+        self.review("2")
+        self.review("3", laundry=other)
+        Laundry.objects.update(review_count=7, review_sum=1, rating=1)
+
+        call_command("recompute_laundry_ratings", stdout=StringIO())
+
+        self.assertRating(1, "2", "2")
+        other.refresh_from_db()
+        self.assertEqual((other.review_count, other.rating), (1, Decimal("3")))
+
+    def test_rating_is_read_only(self):
+        response = self.client.post(
+            reverse("create-laundry"), {"name": "New Laundry", "city": self.city.id, "rating": "5.0"}
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Laundry.objects.get(name="New Laundry").rating, 0)
+
+    def test_backfill_resets_unreviewed_ratings(self):
+        backfill = import_module("laundry_app.migrations.0008_laundry_review_totals").backfill_review_totals
+        other = Laundry.objects.create(name="Other", city=self.city)
+        self.review("2")
+        Laundry.objects.update(review_count=0, review_sum=0, rating=4)
+
+        backfill(django_apps, None)
+
+        self.assertRating(1, "2", "2")
+        other.refresh_from_db()
+        self.assertEqual((other.review_count, other.rating), (0, 0))
+
+    def test_listing_orders_by_rating(self):
+        other = Laundry.objects.create(name="Other", city=self.city)
+        self.review("3")
+        self.review("5", laundry=other)
+
+        response = self.client.get(
+            reverse("laundry-list-by-city"), {"city_id": self.city.id, "ordering": "-rating"}
+        )
+
+        self.assertEqual([l["name"] for l in response.data["results"]], ["Other", "Fresh Laundry"])
+
+
+class LaundryReviewListTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user.full_name = "Sara"
+        self.user.save()
+        customers = [self.user] + [
+            User.objects.create_user(mobile=f"5100000{i}", full_name=f"Customer {i}") for i in range(4)
+        ]
+        self.reviews = [
+            LaundryReview.objects.create(customer=customers[i % 5], laundry=self.laundry, rating=i % 5 + 1)
+            for i in range(25)
+        ]
+
+    def url(self):
+        return reverse("laundry-reviews-list", args=[self.laundry.id])
+
+    def test_tampered_cursor_value(self):
+        cursor = urlsafe_b64encode(json.dumps({"o": "-created_at", "v": "garbage", "pk": 1, "r": False}).encode())
+        self.assertEqual(self.client.get(self.url(), {"cursor": cursor.decode()}).status_code, 404)
+
+    def test_cursor_walk_returns_newest_first(self):
+        params, seen = {"page_size": 10}, []
+        while True:
+            response = self.client.get(self.url(), params)
+            self.assertEqual(response.status_code, 200)
+            seen += [review["id"] for review in response.data["results"]]
+            if not response.data["next"]:
+                break
+            params["cursor"] = response.data["next"]
+
+        self.assertEqual(seen, [review.id for review in reversed(self.reviews)])
+        self.assertIsNone(response.data["count"])
+
+    def test_customer_name_and_constant_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url(), {"page_size": 10})
+        self.assertEqual(response.data["results"][-1]["customer_name"], "Sara")
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url(), {"page_size": 10, "cursor": response.data["next"]})
+
+    def test_other_laundries_reviews_excluded(self):
+        other = Laundry.objects.create(name="Other", city=self.city)
+        LaundryReview.objects.create(customer=self.user, laundry=other, rating=1)
+
+        response = self.client.get(self.url(), {"page_size": 100, "count": "exact"})
+
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 25)
+
+
+class LocationTreeTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        clear_local_tree()
+        City.objects.create(country=self.country, name="Al Wakrah")
+        uae = Country.objects.create(
+            name="United Arab Emirates", country_code="AE", currency_name="Dirham", currency_code="AED"
+        )
+        City.objects.create(country=uae, name="Dubai")
+
+    def get(self, **params):
+        return self.client.get(reverse("locations"), params)
+
+    def test_tree_is_built_once(self):
+        with self.assertNumQueries(2):
+            response = self.get()
+        self.assertEqual(
+            [(c["name"], [city["name"] for city in c["cities"]]) for c in response.data],
+            [("Qatar", ["Al Wakrah", "Doha"]), ("United Arab Emirates", ["Dubai"])],
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().data, response.data)
+
+        # Another process only has the shared cache
+        clear_local_tree()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().data, response.data)
+
+    def test_single_country_by_normalized_name(self):
+        self.get()
+
+        with self.assertNumQueries(0):
+            response = self.get(country="  united ARAB   emirates ")
+        self.assertEqual(response.data["currency_code"], "AED")
+        self.assertEqual(self.get(country="Oman").status_code, 404)
+
+    def test_city_write_rebuilds_tree(self):
+        self.get()
+
+        City.objects.create(country=self.country, name="Lusail")
+        response = self.get(country="qatar")
+
+        self.assertEqual([city["name"] for city in response.data["cities"]], ["Al Wakrah", "Doha", "Lusail"])
+
+
+class LoadGCCDataTests(LaundryTestDataMixin, TestCase):
+
+    def write(self, name, content):
+        path = Path(self.tmp.name) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def load(self, **options):
+        call_command("load_gcc_data", stdout=StringIO(), **options)
+
+    def test_default_data_is_idempotent(self):
+        self.load()
+        self.load()
+
+        self.assertEqual(Country.objects.count(), 6)
+        self.assertEqual(City.objects.count(), 18)
+        # Qatar/Doha from setUp were kept, not duplicated
+        self.assertEqual(City.objects.filter(name="Doha").get(), self.city)
+
+    def test_files(self):
+        countries = self.write("countries.json", json.dumps([
+            {"name": "Jordan", "country_code": "jo", "currency_name": "Dinar", "currency_code": "jod"},
+        ]))
+        cities = self.write("cities.csv", "country,name\nJO,Amman\nJordan, Irbid \nQatar,Lusail\n")
+
+        self.load(countries=countries, cities=cities)
+
+        self.assertEqual(Country.objects.get(name="Jordan").currency_code, "JOD")
+        self.assertEqual(
+            sorted(City.objects.values_list("country__name", "name")),
+            [("Jordan", "Amman"), ("Jordan", "Irbid"), ("Qatar", "Doha"), ("Qatar", "Lusail")],
+        )
+
+    def test_price_sheet_upserts(self):
+        rows = "".join(f"Shirts,Shirt {i},{i}.50\n" for i in range(300))
+        sheet = self.write("prices.csv", "category,item,price\n" + rows)
+        menu = get_cached_laundry_menu(self.laundry.id)
+
+        self.load(prices=sheet, laundry=self.laundry.id, batch_size=100)
+        self.load(
+            prices=self.write("update.csv", "category,item,price\nShirts,Shirt 1,9\nTrousers,Jeans,12\n"),
+            laundry=self.laundry.id,
+        )
+
+        self.assertEqual(Item.objects.count(), 301)
+        self.assertEqual(ItemPrice.objects.filter(laundry=self.laundry).count(), 301)
+        self.assertEqual(ItemPrice.objects.get(item__name="Shirt 1").price, Decimal("9"))
+        self.assertEqual(ItemPrice.objects.get(item__name="Shirt 2").price, Decimal("2.50"))
+        self.assertNotEqual(get_cached_laundry_menu(self.laundry.id), menu)
+        self.assertEqual([r["name"] for r in search("jeans")], ["Jeans"])
+
+    def test_errors_roll_back(self):
+        cities = self.write("cities.csv", "country,name\nQatar,Lusail\nAtlantis,Nowhere\n")
+
+        with self.assertRaisesMessage(CommandError, "Unknown country 'Atlantis'"):
+            self.load(cities=cities)
+        self.assertFalse(City.objects.filter(name="Lusail").exists())
+
+        with self.assertRaisesMessage(CommandError, "--prices needs --laundry"):
+            self.load(prices=cities)
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_generate_then_benchmark(self):
+        call_command(
+            "generate_synthetic_data", users=5, laundries=3, items_per_category=1, orders=20, stdout=StringIO()
+        )
+        self.assertEqual(ItemPrice.objects.count(), 30)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertEqual(LaundryReview.objects.count(), 15)
+        # Ratings come from the generated reviews, like they would in production
+        for laundry in Laundry.objects.all():
+            reviews = LaundryReview.objects.filter(laundry=laundry)
+            self.assertEqual(laundry.review_count, 5)
+            self.assertEqual(laundry.review_sum, sum(review.rating for review in reviews))
+            self.assertEqual(laundry.rating, round(laundry.review_sum / 5, 1))
+
+        with TemporaryDirectory() as tmp:
+            report_path = Path(tmp) / "report.json"
+            call_command("benchmark_endpoints", requests=3, warmup=1, json=str(report_path), stdout=StringIO())
+            report = json.loads(report_path.read_text())
+
+            self.assertEqual(set(report), {"laundry_list", "menu", "add_to_cart", "place_order", "otp_login"})
+            self.assertEqual(report["menu"]["requests"], 3)
+            # Benchmark writes are rolled back
+            self.assertEqual(Order.objects.count(), 20)
+
+            report["laundry_list"]["queries_max"] = 0
+            report_path.write_text(json.dumps(report))
+            with self.assertRaisesMessage(CommandError, "laundry_list: 0 -> "):
+                call_command(
+                    "benchmark_endpoints", requests=3, warmup=0, scenario=["laundry_list"],
+                    baseline=str(report_path), stdout=StringIO(),
+                )
+
+
+@override_settings(REQUEST_METRICS={"SERVER_TIMING": True, "TOKEN": "secret"})
+class RequestMetricsTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+
+    def scrape(self):
+        return self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret").content.decode()
+
+    def test_server_timing_and_histograms(self):
+        self.create_menu(categories=2, items_per_category=2)
+
+        response = self.client.get(reverse("laundry-items", args=[self.laundry.id]))
+
+        timing = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"total", "db", "render"})
+        self.assertIn('desc="2 queries"', timing["db"])
+
+        metrics = self.scrape()
+        self.assertIn('db_queries_per_request_bucket{view="laundry-items",method="GET",le="2"} 1', metrics)
+        self.assertIn('http_request_duration_seconds_count{view="laundry-items",method="GET"} 1', metrics)
+        self.assertIn('render_duration_seconds_count{view="laundry-items",method="GET"} 1', metrics)
+        self.assertIn('http_response_size_bytes_sum{view="laundry-items",method="GET"} %d' % len(response.content), metrics)
+
+    def test_n_plus_one_threshold(self):
+        with self.settings(REQUEST_METRICS={"N_PLUS_ONE_THRESHOLD": 1, "TOKEN": "secret"}), \
+                self.assertLogs("hello_laundry_apis.metrics", "WARNING") as logs:
+            self.client.get(reverse("laundry-items", args=[self.laundry.id]))
+
+        self.assertIn("over the N+1 threshold of 1", logs.output[0])
+        self.assertIn('n_plus_one_requests_total{view="laundry-items",method="GET"} 1', self.scrape())
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+        with self.settings(REQUEST_METRICS={}):
+            response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer None")
+        self.assertEqual(response.status_code, 403)
+
+    def test_server_timing_is_off_by_default(self):
+        with self.settings(REQUEST_METRICS={}):
+            response = self.client.get(reverse("laundry-items", args=[self.laundry.id]))
+        self.assertNotIn("Server-Timing", response)
+
+
+class ValuesSerializerTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.laundry.image = "laundry_images/fresh.png"
+        self.laundry.latitude, self.laundry.longitude = Decimal("25.285447"), Decimal("51.531040")
+        self.laundry.rating, self.laundry.starting_price = Decimal("4.5"), Decimal("12")
+        self.laundry.save()
+        for name in ["Wash", "Iron"]:
+            self.laundry.services.add(Service.objects.create(name=name, starting_price=5))
+        Laundry.objects.create(name="Bare Laundry", city=self.city)
+        City.objects.create(country=self.country, name="Al Khor")
+        self.create_menu(categories=1, items_per_category=3)
+        Item.objects.filter(name="Item 0-1").update(image="item_images/shirt.png")
+        Item.objects.create(category=Category.objects.get(), name="Unpriced")
+
+    def assertSameJSON(self, fast, drf):
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_matches_drf_serializers(self):
+        request = APIRequestFactory().get("/")
+        cases = [
+            (LaundryValuesSerializer, Laundry.objects.all(), {"request": request}),
+            (CountryValuesSerializer, Country.objects.all(), {}),
+        ]
+        for values_serializer, queryset, context in cases:
+            serializer_class = values_serializer.serializer_class
+            if hasattr(serializer_class, "setup_eager_loading"):
+                queryset = serializer_class.setup_eager_loading(queryset)
+            drf = serializer_class(queryset, many=True, context=context).data
+
+            self.assertSameJSON(values_serializer(context).many(queryset), drf)
+
+    def test_columns_are_compiled_once_per_class(self):
+        LaundryValuesSerializer()
+        with mock.patch.object(LaundrySerializer, "get_fields") as get_fields:
+            serializer = LaundryValuesSerializer({"request": APIRequestFactory().get("/")})
+        get_fields.assert_not_called()
+        self.assertIn("image", [name for name, _, _ in serializer.columns])
+
+    def test_endpoints_match_drf_path(self):
+        requests = [
+            (LaundryListByCityView, reverse("laundry-list-by-city"), {"city_id": self.city.id, "ordering": "-rating"}),
+            (LaundryListByCityView, reverse("laundry-list-by-city"), {"cursor": "", "page_size": 1}),
+        ]
+        for view, url, params in requests:
+            cache.clear()
+            fast = self.client.get(url, params).content
+            cache.clear()
+            with mock.patch.object(view, "values_serializer_class", None):
+                drf = self.client.get(url, params).content
+            self.assertEqual(fast, drf)
+
+    def test_cursor_walk(self):
+        params, seen = {"cursor": "", "page_size": 1, "ordering": "review_count"}, []
+        while True:
+            response = self.client.get(reverse("laundry-list-by-city"), params)
+            seen += [row["name"] for row in response.data["results"]]
+            if not response.data["next"]:
+                break
+            params["cursor"] = response.data["next"]
+
+        self.assertEqual(sorted(seen), ["Bare Laundry", "Fresh Laundry"])
+
+
+class ItemsByCategoryWithPriceTests(LaundryTestDataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_menu(categories=1, items_per_category=5)
+        self.category = Category.objects.get()
+        for i in range(3):
+            Item.objects.create(category=self.category, name=f"Unpriced {i}")
+        other = Laundry.objects.create(name="Other", city=self.city)
+        ItemPrice.objects.create(laundry=other, item=Item.objects.get(name="Unpriced 0"), price=1)
+
+    def get(self, **params):
+        cache.clear()
+        return self.client.get(
+            reverse("items-by-category-with-price"),
+            {"laundry_id": self.laundry.id, "category_id": self.category.id, **params},
+        )
+
+    def test_prices_are_the_selected_laundrys(self):
+        response = self.get()
+
+        self.assertEqual(response.data["count"], 8)
+        prices = {item["name"]: item["price"] for item in response.data["results"]}
+        self.assertEqual(prices["Item 0-2"], Decimal("7.00"))
+        self.assertIsNone(prices["Unpriced 0"])
+
+    def test_priced_only_and_pagination(self):
+        first = self.get(priced_only="true", page_size=3)
+        second = self.get(priced_only="true", page_size=3, page=2)
+
+        self.assertEqual(first.data["count"], 5)
+        self.assertEqual(first.data["next"], 2)
+        self.assertEqual(
+            [item["name"] for item in first.data["results"] + second.data["results"]],
+            [f"Item 0-{i}" for i in range(5)],
+        )
+
+    def test_unread_params_share_the_snapshot(self):
+        url = reverse("items-by-category-with-price")
+        params = {"laundry_id": self.laundry.id, "category_id": self.category.id}
+        expected = self.get().data
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {**params, "utm_source": "x"})
+        self.assertEqual(response.data, expected)
+        # Params the view reads get their own snapshot
+        with self.assertNumQueries(2):
+            self.client.get(url, {**params, "priced_only": "true"})
+
+    def test_query_count_does_not_grow_with_items(self):
+        # count, then the page with prices as a column
+        with self.assertNumQueries(2):
+            self.get(page_size=100)
+
+        for i in range(20):
+            item = Item.objects.create(category=self.category, name=f"Extra {i}")
+            ItemPrice.objects.create(laundry=self.laundry, item=item, price=3)
+        with self.assertNumQueries(2):
+            response = self.get(page_size=100)
+        self.assertEqual(len(response.data["results"]), 28)
+
+
+class GetOrComputeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value="fresh", delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_caches_under_namespaced_key(self):
+        key = make_key("test", "value", 1)
+        self.assertEqual(key, "test:value:1")
+
+        self.assertEqual(get_or_compute(key, self.compute(), 60), "fresh")
+        self.assertEqual(get_or_compute(key, self.compute("other"), 60), "fresh")
+        self.assertEqual(self.calls, 1)
+
+    def test_concurrent_misses_compute_once(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda _: get_or_compute("test:stampede", self.compute(delay=0.2), 60), range(8)
+            ))
+
+        self.assertEqual(results, ["fresh"] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_early_refresh_near_expiry(self):
+        get_or_compute("test:early", self.compute("old", delay=0.01), 60)
+
+        # An unlucky draw refreshes an entry that took a while to compute
+        # even a minute before it expires
+        with mock.patch("hello_laundry_apis.caching.random.random", return_value=1e-300):
+            self.assertEqual(get_or_compute("test:early", self.compute("new"), 60, beta=50), "new")
+        self.assertEqual(get_or_compute("test:early", self.compute("newer"), 60), "new")
+
+    def test_stale_value_served_while_another_worker_refreshes(self):
+        get_or_compute("test:busy", self.compute("old", delay=0.01), 60)
+        cache.add(make_key("lock", "test:busy"), "other worker", 30)
+
+        with mock.patch("hello_laundry_apis.caching.random.random", return_value=1e-300):
+            self.assertEqual(get_or_compute("test:busy", self.compute("new"), 60, beta=50), "old")
+        self.assertEqual(self.calls, 1)
+
+
+    def test_version_keys_survive_a_large_catalogue(self):
+        version = get_version(LANGUAGES_VERSION_KEY)
+        cache.set_many({f"test:menu:{i}": i for i in range(2000)})
+
+        self.assertEqual(get_version(LANGUAGES_VERSION_KEY), version)
+
+    def test_cache_is_shared(self):
+        self.assertFalse(cache_is_shared())
+        db_cache = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "t"}}
+        with self.settings(CACHES=db_cache):
+            self.assertTrue(cache_is_shared())
+
+class AsyncViewTests(LaundryTestDataMixin, TestCase):
+    """
+    The views served in ASGI mode answer like the DRF views they replace.
+    """
+
+    def setUp(self):
+        super().setUp()
+        local_token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        Language.objects.create(name="English", code="en")
+        IssueCategory.objects.create(title="Late pickup")
+        SupportContact.objects.create(
+            country=self.country, support_phone="+97440000000", support_email="help@example.com"
+        )
+
+    def call(self, view, url, data=None, token=None, headers=None):
+        headers = dict(headers or {})
+        if token is None:
+            token = self.token.key
+        if token:
+            headers["authorization"] = f"Token {token}"
+        request = AsyncRequestFactory().get(url, data, headers=headers)
+        return async_to_sync(view.as_view())(request)
+
+    def test_same_responses_as_sync_views(self):
+        cases = [
+            ("language-list", async_views.LanguageListView, None),
+            ("issue-list", async_views.IssueCategoryListView, None),
+            ("support-contact", async_views.SupportContactView, {"country": "qatar"}),
+            ("support-contact", async_views.SupportContactView, {"country": "Oman"}),
+            ("support-contact", async_views.SupportContactView, None),
+        ]
+        for name, view, query in cases:
+            expected = self.client.get(reverse(name), query)
+            response = self.call(view, reverse(name), query)
+
+            self.assertEqual(response.status_code, expected.status_code)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+            self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_unchanged_catalogue_returns_304_without_queries(self):
+        url = reverse("language-list")
+        etag = self.call(async_views.LanguageListView, url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.call(async_views.LanguageListView, url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etags_with_the_database_cache(self):
+        # The default cache without REDIS_URL; it can't be used from the event loop
+        db_cache = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_cache"}}
+        with self.settings(CACHES=db_cache):
+            call_command("createcachetable", verbosity=0)
+            for name, view in [("language-list", async_views.LanguageListView),
+                               ("issue-list", async_views.IssueCategoryListView)]:
+                response = self.call(view, reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["ETag"], self.client.get(reverse(name))["ETag"])
+
+                response = self.call(view, reverse(name), headers={"if-none-match": response["ETag"]})
+                self.assertEqual(response.status_code, 304)
+
+    def test_token_is_required(self):
+        url = reverse("issue-list")
+
+        response = self.call(async_views.IssueCategoryListView, url, token="")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+        response = self.call(async_views.IssueCategoryListView, url, token="nope")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content), {"detail": "Invalid token."})
+
+    def test_warm_token_skips_the_database(self):
+        url = reverse("support-contact")
+        # token + user, support contact
+        with self.assertNumQueries(2):
+            self.call(async_views.SupportContactView, url, {"country": "Qatar"})
+        with self.assertNumQueries(1):
+            self.call(async_views.SupportContactView, url, {"country": "Qatar"})
+
+    def test_request_metrics_under_asgi(self):
+        registry.clear()
+        # The async handler loads the middleware on the event loop's thread;
+        # the test database connection was opened on this one before that
+        install_query_recording()
+        with self.settings(REQUEST_METRICS={"SERVER_TIMING": True}):
+            response = async_to_sync(AsyncClient().get)(
+                reverse("language-list"), headers={"authorization": f"Token {self.token.key}"}
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
 
-# Create your tests here.
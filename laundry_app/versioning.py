@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Version counters for the read-mostly catalogue endpoints. They live in
+# the default cache, which every worker must share (see settings.CACHES):
+# with a per-process cache a write would only invalidate the worker that
+# handled it.
+LOCATIONS_VERSION_KEY = "catalogue:version:locations"
+SERVICES_VERSION_KEY = "catalogue:version:services"
+CATEGORIES_VERSION_KEY = "catalogue:version:categories"
+LANGUAGES_VERSION_KEY = "catalogue:version:languages"
+ISSUES_VERSION_KEY = "catalogue:version:issues"
+
+
+def _incr_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter was never set or got evicted. Restart from a clock value
+        # so it can't fall back to a number an old snapshot is stored under.
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_version(key):
+    """
+    Invalidate everything built against the current value of `key`.
+
+    Bumped again once the surrounding transaction commits, so a reader
+    that rebuilt from not-yet-committed rows in between doesn't keep
+    serving the result.
+    """
+    _incr_version(key)
+    transaction.on_commit(lambda: _incr_version(key))
+
+
+def get_version(*keys):
+    """
+    Current value of one or more version counters, joined into a string.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+async def aget_version(*keys):
+    """
+    `get_version` for async views.
+    """
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), None)
+            versions[key] = await cache.aget(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def _etag(version, request):
+    raw = f"{version}:{request.get_full_path()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def catalogue_etag(*keys):
+    """
+    Build an `etag_func` for django.views.decorators.http.condition that
+    changes whenever one of the version counters is bumped. The query
+    string is part of the tag, so filtered responses get their own.
+    """
+    def etag_func(request, *args, **kwargs):
+        return _etag(get_version(*keys), request)
+    return etag_func
+
+
+async def acatalogue_etag(request, *keys):
+    """
+    The tag `catalogue_etag(*keys)` gives `request`, for async views; see
+    AsyncAPIView.get_etag.
+    """
+    return _etag(await aget_version(*keys), request)
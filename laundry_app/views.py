@@ -1,21 +1,36 @@
 from rest_framework import generics, status
-from .models import Service, Country, Cart, CartItem, Laundry, Category, CustomerAddress, Language, SupportContact, IssueCategory, LaundryReview, Laundry
+from .models import (Service, Country, Cart, CartItem, Laundry, Category, CustomerAddress, Language, SupportContact, IssueCategory, LaundryReview, Laundry, Item,
+    Order, ORDER_STATUS, PAYMENT_STATUS, SearchDocument)
 from .serializers import (ServiceSerializer, CountryWithCitiesSerializer, LaundrySerializer, CartSerializer, 
     CartItemSerializer, LaundryCreateSerializer, CategorySerializer, CategoryListSerializer, ItemWithPriceSerializer, CustomerAddressSerializer,
-    LanguageSerializer, SupportContactSerializer, IssueCategorySerializer, ReportIssueSerializer, LaundryReviewSerializer)
+    LanguageSerializer, SupportContactSerializer, IssueCategorySerializer, ReportIssueSerializer, LaundryReviewSerializer,
+    NearbyLaundrySerializer, NearbyLaundryQuerySerializer, AddToCartSerializer, BatchAddToCartSerializer)
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.authentication import TokenAuthentication
+from accounts.authentication import CachedTokenAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 from rest_framework.filters import OrderingFilter
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .pagination import StandardResultsSetPagination
-
+from .pagination import CursorResultsSetPagination, StandardResultsSetPagination
+from .fast_serializers import LaundryValuesSerializer, ValuesListMixin
+from .filters import LaundryFilter
+from .geo import nearest
+from .orders import OrderPlacementError, place_order
+from .carts import CartUpdateError, add_to_cart
+from .search import search
+from .locations import get_country, get_location_tree
+from .menu import annotate_laundry_price, get_cached_laundry_menu, get_menu_snapshot
+from .versioning import (catalogue_etag, CATEGORIES_VERSION_KEY, ISSUES_VERSION_KEY, LANGUAGES_VERSION_KEY,
+    LOCATIONS_VERSION_KEY, SERVICES_VERSION_KEY)
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+@method_decorator(condition(etag_func=catalogue_etag(LANGUAGES_VERSION_KEY)), name="get")
 class LanguageListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     serializer_class = LanguageSerializer
 
     def get_queryset(self):
@@ -24,7 +39,7 @@ class LanguageListView(generics.ListAPIView):
 class CustomerAddressListCreateView(generics.ListCreateAPIView):
     serializer_class = CustomerAddressSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get_queryset(self):
         user = self.request.user
@@ -35,7 +50,7 @@ class CustomerAddressListCreateView(generics.ListCreateAPIView):
 class CustomerAddressDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CustomerAddressSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get_queryset(self):
         user = self.request.user
@@ -45,7 +60,7 @@ class CustomerAddressDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class SetDefaultAddressView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def post(self, request, pk):
         try:
@@ -69,14 +84,16 @@ class SetDefaultAddressView(APIView):
             {"message": "Default address set successfully"}
         )
 
+@method_decorator(condition(etag_func=catalogue_etag(SERVICES_VERSION_KEY)), name="get")
 class ServiceListAPIView(generics.ListAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = Service.objects.filter(is_active=True)
     serializer_class = ServiceSerializer
 
+@method_decorator(condition(etag_func=catalogue_etag(LOCATIONS_VERSION_KEY)), name="get")
 class LocationListView(generics.GenericAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [AllowAny]
     serializer_class = CountryWithCitiesSerializer
 
@@ -94,35 +111,28 @@ class LocationListView(generics.GenericAPIView):
     def get(self, request):
         country_name = request.query_params.get('country')
         if country_name:
-            try:
-                country = Country.objects.get(name__iexact=country_name)
-                serializer = self.get_serializer(country)
-                return Response(serializer.data)
-            except Country.DoesNotExist:
+            country = get_country(country_name)
+            if country is None:
                 return Response({"detail": "Country not found"}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            countries = Country.objects.all()
-            serializer = self.get_serializer(countries, many=True)
-            return Response(serializer.data)
+            return Response(country)
+        return Response(get_location_tree()["countries"])
 
-class LaundryListByCityView(generics.ListAPIView):
-    authentication_classes = [TokenAuthentication]
+class LaundryListByCityView(ValuesListMixin, generics.ListAPIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = LaundrySerializer
+    values_serializer_class = LaundryValuesSerializer
     pagination_class = StandardResultsSetPagination
 
     queryset = Laundry.objects.filter(is_active=True)
 
     filter_backends = [DjangoFilterBackend, OrderingFilter]
 
-    filterset_fields = {
-        'city__name': ['icontains'],
-        'rating': ['gte', 'lte'],
-        'starting_price': ['gte', 'lte'],
-    }
+    filterset_class = LaundryFilter
 
     ordering_fields = [
         'rating',
+        'review_count',
         'starting_price',
         'created_at',
         'name'
@@ -130,106 +140,135 @@ class LaundryListByCityView(generics.ListAPIView):
 
     ordering = ['-created_at']  
 
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset())
+
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('city__name', openapi.IN_QUERY, type=openapi.TYPE_STRING, description="City name"),
+            openapi.Parameter('city_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="City ID"),
+            openapi.Parameter('city_name', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="City name (case and whitespace insensitive)"),
+            openapi.Parameter('city__name__icontains', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Part of a city name (deprecated, use city_id or city_name)"),
             openapi.Parameter('rating__gte', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Min rating"),
             openapi.Parameter('rating__lte', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Max rating"),
             openapi.Parameter('starting_price__gte', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Min price"),
             openapi.Parameter('starting_price__lte', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description="Max price"),
             openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
                               description="Sort by: rating, -rating, starting_price, -created_at"),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Keyset pagination: pass empty for the first page, then next/previous"),
+            openapi.Parameter('count', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="With cursor: exact or estimate (skipped by default)"),
         ]
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+class NearbyLaundryListView(generics.GenericAPIView):
+    """
+    Active laundries closest to a saved address or a lat/lng point
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = NearbyLaundrySerializer
+
+    @swagger_auto_schema(query_serializer=NearbyLaundryQuerySerializer)
+    def get(self, request):
+        params = NearbyLaundryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        if params.get("address_id") is not None:
+            try:
+                address = CustomerAddress.objects.get(pk=params["address_id"], user=request.user)
+            except CustomerAddress.DoesNotExist:
+                return Response({"detail": "Address not found"}, status=status.HTTP_404_NOT_FOUND)
+            lat, lng = address.latitude, address.longitude
+        else:
+            lat, lng = params["lat"], params["lng"]
+
+        queryset = Laundry.objects.filter(is_active=True)
+        nearby = nearest(queryset, lat, lng, params["radius_km"], params["limit"])
+
+        laundries = self.get_serializer_class().setup_eager_loading(queryset).in_bulk(
+            [pk for _, pk in nearby]
+        )
+        results = []
+        for distance, pk in nearby:
+            laundry = laundries[pk]
+            laundry.distance_km = distance
+            results.append(laundry)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+
 class LaundryCreateView(generics.CreateAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = Laundry.objects.all()
     serializer_class = LaundryCreateSerializer
 
 class AddToCartView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    serializer_class = AddToCartSerializer
+    message = "Item added to cart"
+
+    def get_lines(self, data):
+        return {data["item_price"]: data["quantity"]}
 
+    @swagger_auto_schema(request_body=AddToCartSerializer)
     def post(self, request):
-        user = request.user
-        laundry_id = request.data.get("laundry")
-        service_id = request.data.get("service")
-        quantity = int(request.data.get("quantity", 1))
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
         try:
-            service = Service.objects.get(id=service_id)
-        except Service.DoesNotExist:
-            return Response({"error": "Service not found"}, status=404)
-
-        cart, created = Cart.objects.get_or_create(
-            user=user,
-            laundry_id=laundry_id,
-            is_active=True
-        )
-
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            service=service,
-            defaults={"quantity": quantity}
-        )
-
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+            cart = add_to_cart(request.user, data["laundry"], data["service"], self.get_lines(data))
+        except CartUpdateError as ex:
+            return Response({"error": str(ex)}, status=400)
 
+        cart = CartSerializer.setup_eager_loading(Cart.objects.filter(pk=cart.pk)).get()
         return Response({
-            "message": "Item added to cart",
+            "message": self.message,
             "cart": CartSerializer(cart).data
         })
 
+class BatchAddToCartView(AddToCartView):
+    """
+    Add several items to the cart in one request
+    """
+    serializer_class = BatchAddToCartSerializer
+    message = "Items added to cart"
+
+    def get_lines(self, data):
+        return data["items"]
+
+    @swagger_auto_schema(request_body=BatchAddToCartSerializer)
+    def post(self, request):
+        return super().post(request)
+
 class LaundryItemListView(APIView):
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get(self, request, laundry_id):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True, context={"laundry_id": laundry_id})
-        return Response(serializer.data)
+        return Response(get_cached_laundry_menu(laundry_id))
 
 class PlaceOrderView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        user = request.user
+        cart_id = request.data.get("cart")
+        if cart_id is not None and not str(cart_id).isdigit():
+            return Response({"error": "Invalid cart"}, status=400)
 
         try:
-            cart = Cart.objects.get(user=user, is_active=True)
-        except Cart.DoesNotExist:
-            return Response({"error": "No active cart found"}, status=400)
-
-        order = Order.objects.create(
-            user=user,
-            laundry=cart.laundry,
-            status="pending",
-            payment_status="pending"
-        )
-
-        total = 0
-
-        for cart_item in cart.items.all():
-            order_item = OrderItem.objects.create(
-                order=order,
-                item_price=cart_item.item_price,
-                quantity=cart_item.quantity,
-                price=cart_item.item_price.price
-            )
-            total += order_item.subtotal()
-
-        order.total_price = total
-        order.save()
-
-        cart.is_active = False
-        cart.save()
+            order = place_order(request.user, cart_id=cart_id)
+        except OrderPlacementError as ex:
+            return Response({"error": str(ex)}, status=400)
 
         return Response({
             "message": "Order placed successfully",
@@ -237,7 +276,7 @@ class PlaceOrderView(APIView):
         }, status=201)
 
 class UpdateOrderStatusView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, order_id):
@@ -258,7 +297,7 @@ class UpdateOrderStatusView(APIView):
 
 
 class UpdatePaymentStatusView(APIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, order_id):
@@ -277,15 +316,17 @@ class UpdatePaymentStatusView(APIView):
 
         return Response({"message": "Payment status updated successfully"})
 
+@method_decorator(condition(etag_func=catalogue_etag(CATEGORIES_VERSION_KEY)), name="get")
 class CategoryListView(generics.ListAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = Category.objects.all()
     serializer_class = CategoryListSerializer
 
 class ItemsByCategoryWithPriceView(generics.ListAPIView):
     serializer_class = ItemWithPriceSerializer
-    authentication_classes = [TokenAuthentication]
+    pagination_class = StandardResultsSetPagination
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -311,11 +352,55 @@ class ItemsByCategoryWithPriceView(generics.ListAPIView):
                 type=openapi.TYPE_INTEGER,
                 required=True,
             ),
+            openapi.Parameter(
+                "priced_only",
+                openapi.IN_QUERY,
+                description="Only items the laundry has a price for",
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+            ),
+            openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
         ]
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        laundry_id = self.get_laundry_id()
+        if laundry_id is None:
+            return super().list(request, *args, **kwargs)
+
+        data = get_menu_snapshot(
+            laundry_id,
+            lambda: super(ItemsByCategoryWithPriceView, self).list(request, *args, **kwargs).data,
+            "items-by-category",
+            self.get_snapshot_params(),
+            # Item images are serialized as absolute URLs
+            request.get_host(),
+        )
+        return Response(data)
+
+    def get_snapshot_params(self):
+        """
+        The query params the response depends on. Anything else is left
+        out of the snapshot key, so made-up params can't each add an entry.
+        """
+        paginator = self.paginator
+        names = [
+            "category_id", "category_name", "priced_only",
+            paginator.page_query_param, paginator.page_size_query_param,
+            paginator.cursor_query_param, paginator.count_query_param,
+        ]
+        params = self.request.query_params
+        return [(name, params.getlist(name)) for name in names if name in params]
+
+    def get_laundry_id(self):
+        try:
+            return int(self.request.query_params.get("laundry_id"))
+        except (TypeError, ValueError):
+            return None
+
     def get_queryset(self):
         category_id = self.request.query_params.get("category_id")
         category_name = self.request.query_params.get("category_name")
@@ -331,7 +416,10 @@ class ItemsByCategoryWithPriceView(generics.ListAPIView):
         else:
             return Item.objects.none()
 
-        return queryset.prefetch_related("prices")
+        queryset = annotate_laundry_price(queryset, self.get_laundry_id())
+        if self.request.query_params.get("priced_only") in ("1", "true", "True"):
+            queryset = queryset.filter(laundry_price__isnull=False)
+        return queryset.order_by("name", "id")
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -343,7 +431,7 @@ class SupportContactView(APIView):
     Get support contact based on country NAME
     """
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -380,11 +468,12 @@ class SupportContactView(APIView):
         serializer = SupportContactSerializer(support)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+@method_decorator(condition(etag_func=catalogue_etag(ISSUES_VERSION_KEY)), name="get")
 class IssueCategoryListView(APIView):
     """
     List predefined issues
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -399,7 +488,7 @@ class ReportIssueView(APIView):
     """
     Report an issue (select or custom)
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -416,12 +505,19 @@ class ReportIssueView(APIView):
             "errors": serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
-class LaundryReviewListView(APIView):
+class LaundryReviewListView(generics.ListAPIView):
     """
-    List all reviews for a laundry
+    List a laundry's reviews, newest first, a page at a time. Pages are
+    keyset paginated on (created_at, id): follow `next` to scroll.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    serializer_class = LaundryReviewSerializer
+    pagination_class = CursorResultsSetPagination
+
+    def get_queryset(self):
+        reviews = LaundryReview.objects.filter(laundry_id=self.kwargs['laundry_id'])
+        return self.get_serializer_class().setup_eager_loading(reviews)
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -431,29 +527,65 @@ class LaundryReviewListView(APIView):
                 description="Laundry ID",
                 type=openapi.TYPE_INTEGER,
                 required=True
-            )
-        ],
-        responses={200: LaundryReviewSerializer(many=True)}
+            ),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="`next`/`previous` from the previous page"),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('count', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="exact or estimate; omitted by default"),
+        ]
     )
-    def get(self, request, laundry_id):
-        reviews = LaundryReview.objects.filter(laundry_id=laundry_id)
-        serializer = LaundryReviewSerializer(reviews, many=True)
-        return Response({"success": True, "data": serializer.data})
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class LaundryReviewCreateView(APIView):
     """
     Add a new review for a laundry
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, laundry_id):
         data = request.data.copy()
-        data['customer'] = request.user.id
         data['laundry'] = laundry_id
         serializer = LaundryReviewSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            # `customer` is read-only on the serializer, so it's set here
+            serializer.save(customer=request.user)
             return Response({"success": True, "message": "Review added successfully"}, status=status.HTTP_201_CREATED)
         return Response({"success": False, "errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over laundries, services and items
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="Search text, English or Arabic"),
+            openapi.Parameter("type", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="laundry, service or item"),
+            openapi.Parameter("limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Max results (default 20, max 50)"),
+        ]
+    )
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"message": "q parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        object_type = request.query_params.get("type")
+        if object_type and object_type not in dict(SearchDocument.TYPE_CHOICES):
+            return Response({"message": "Invalid type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 50)
+        except ValueError:
+            return Response({"message": "Invalid limit"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"results": search(query, object_type=object_type, limit=limit)})